@@ -0,0 +1,162 @@
+"""
+Batch position analysis: best move, score and principal variation of many
+positions, searched in worker processes that each keep a warm engine (and its
+transposition table) from one position to the next. Results come back in input
+order as JSON lines.
+
+    python analyse.py positions.fen --nodes 20000 --workers 8 > results.jsonl
+    python pgn.py games.pgn --fen | python analyse.py - --time 0.5 --chunk-size 32
+
+Input lines are FENs, or JSON objects {"fen": ..., "depth": ..., "nodes": ...,
+"time": ...} whose limits replace the defaults for that position.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from board import Board
+from engine import Engine
+from tablebase import Tablebases
+from uci import move_name, pv_names, mate_moves
+from piece import *
+
+# Engine of the worker process, kept between positions
+_engine = None
+_scores = {}
+
+
+def _start_worker(options):
+    global _engine
+    _engine = Engine(**options, tablebases=Tablebases())
+    _engine.info = lambda depth, score: _scores.__setitem__("score", score)
+
+
+def _analyse(job):
+    """Search one position, the result as a JSON-ready dict"""
+    result = {"fen": job["fen"]}
+    try:
+        board, colour = Board.from_fen(job["fen"])
+    except ValueError as error:
+        result["error"] = str(error)
+        return result
+    _scores.clear()
+    start = time.time()
+    best_move = _engine.search(board, colour, job.get("depth"), job.get("time"), job.get("nodes"))
+    elapsed = time.time() - start
+    if best_move is None:
+        result["error"] = "checkmate" if board.king_in_check(colour) else "stalemate"
+        return result
+
+    pv = pv_names(board, colour, _engine.pv)
+    result["move"] = move_name(board, *best_move)
+    score = _scores.get("score")
+    if score is not None:
+        mate = mate_moves(score, len(pv))
+        if mate is None:
+            result["score"] = int(score)
+        else:
+            result["mate"] = mate
+    elif board.piece_count() <= _engine.tablebases.MAX_PIECES:
+        # move taken from the tablebases without searching
+        probe = _engine.tablebases.probe(board, colour)
+        if probe is not None:
+            outcome, plies = probe
+            if outcome:
+                result["mate"] = outcome * ((plies + 1) // 2)
+            else:
+                result["score"] = 0
+    result.update(depth=_engine.completed_depth, nodes=_engine.nodes, time=round(elapsed, 3), pv=pv)
+    if job.get("stats"):
+        result["stats"] = _engine.stats.as_dict()
+    return result
+
+
+def _analyse_chunk(jobs):
+    return [_analyse(job) for job in jobs]
+
+
+def _chunks(jobs, size):
+    chunk = []
+    for job in jobs:
+        chunk.append(job)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def analyse(positions, workers=None, chunk_size=16, depth=None, node_limit=None, time_limit=None,
+            backend="bitboard", stats=False):
+    """
+    Generator of the analysis (dict: fen, move, score or mate, depth, nodes, time, pv, or error)
+    of every position, in input order
+    - positions: FEN strings, or dicts with "fen" and their own "depth", "nodes" or "time"
+    - workers: processes searching (default: one per CPU)
+    - chunk_size: positions sent to a worker at a time
+    - depth, node_limit, time_limit: limits of each position (default: depth 4 without any)
+    - stats: add the search statistics (SearchStats.as_dict) of each position
+    Only a few chunks per worker are read ahead, so positions can come from a stream
+    """
+    workers = workers or os.cpu_count() or 1
+    defaults = {"depth": depth, "nodes": node_limit, "time": time_limit, "stats": stats}
+
+    def jobs():
+        for position in positions:
+            job = dict(defaults)
+            if isinstance(position, dict):
+                job.update(position)
+            else:
+                job["fen"] = position
+            # a position without any limit of its own or from the defaults searches depth 4
+            if job["depth"] is None and job["nodes"] is None and job["time"] is None:
+                job["depth"] = 4
+            yield job
+
+    with ProcessPoolExecutor(workers, initializer=_start_worker, initargs=({"backend": backend},)) as pool:
+        pending = deque()
+        for chunk in _chunks(jobs(), chunk_size):
+            pending.append(pool.submit(_analyse_chunk, chunk))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def _read_positions(f):
+    for line in f:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        yield json.loads(line) if line.startswith("{") else line
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyse a file of positions, one JSON line per position")
+    parser.add_argument("positions", help="file of FEN or JSON lines (- for stdin)")
+    parser.add_argument("--depth", type=int, help="search depth (default: 4 without node or time limit)")
+    parser.add_argument("--nodes", type=int, help="nodes per position")
+    parser.add_argument("--time", type=float, help="seconds per position")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument("--chunk-size", type=int, default=16, help="positions per worker task (default: 16)")
+    parser.add_argument("--backend", choices=["board", "bitboard"], default="bitboard")
+    parser.add_argument("--stats", action="store_true", help="add the search statistics of each position")
+    args = parser.parse_args(argv)
+
+    f = sys.stdin if args.positions == "-" else open(args.positions)
+    try:
+        for result in analyse(_read_positions(f), args.workers, args.chunk_size, args.depth,
+                              args.nodes, args.time, args.backend, args.stats):
+            print(json.dumps(result), flush=True)
+    finally:
+        if f is not sys.stdin:
+            f.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, only batch evaluation needs it
+    np = None
+
+from piece import *
+from tables import SCORES
+
+# Batch evaluation of many boards at once with NumPy. Boards are encoded as
+# (N, 12, 64) int8 planes, one plane per piece code (side * 6 + kind) over the
+# squares row * 8 + col of the board, or as (N, 64) int8 squares holding
+# code + 1 (0 = empty). The terms follow Engine.evaluate term by term.
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("batch evaluation needs numpy (pip install numpy)")
+
+
+def encode_squares(boards):
+    """(N, 64) int8 array of piece code + 1 per square, 0 for empty squares"""
+    _require_numpy()
+    squares = np.zeros((len(boards), 64), dtype=np.int8)
+    for i, board in enumerate(boards):
+        for colour in (WHITE, BLACK):
+            for row, col in board.piece_squares(colour):
+                piece = board.squares[row][col].piece
+                squares[i, row * 8 + col] = colour * 6 + piece.kind + 1
+    return squares
+
+
+def encode_planes(boards):
+    """(N, 12, 64) int8 array with a 1 where the piece code stands"""
+    _require_numpy()
+    squares = encode_squares(boards)
+    return (squares[:, None, :] == np.arange(1, 13, dtype=np.int8)[None, :, None]).astype(np.int8)
+
+
+def _shift(grid, rows, cols):
+    # grid[..., r, c] moved to [..., r + rows, c + cols], squares shifted in are 0
+    shifted = np.zeros_like(grid)
+    height, width = grid.shape[-2:]
+    shifted[..., max(rows, 0):height + min(rows, 0), max(cols, 0):width + min(cols, 0)] = \
+        grid[..., max(-rows, 0):height + min(-rows, 0), max(-cols, 0):width + min(-cols, 0)]
+    return shifted
+
+
+def material_scores(planes):
+    """Material and piece-square score per board, positive favours white"""
+    _require_numpy()
+    scores = np.array([SCORES[code // 6][code % 6] for code in range(12)], dtype=np.int64)
+    return (planes.astype(np.int64) * scores).sum(axis=(1, 2)) / 100
+
+
+def pawn_structure_scores(planes, colour):
+    """Doubled, isolated and advanced pawn terms of one colour (Engine._evaluate_pawn_structure)"""
+    _require_numpy()
+    grid = planes.reshape(-1, 12, 8, 8).astype(np.int64)
+    pawns = grid[:, colour * 6 + PAWN]
+    enemy_pawns = grid[:, (colour ^ 1) * 6 + PAWN]
+
+    # doubled pawns
+    files = pawns.sum(axis=1)
+    score = -0.3 * np.clip(files - 1, 0, None).sum(axis=1)
+
+    # isolated pawns (no own pawn on an adjacent file)
+    occupied = (files > 0).astype(np.int64)
+    neighbours = _shift(occupied, 0, 1) + _shift(occupied, 0, -1)
+    score = score - 0.2 * (files * (neighbours == 0)).sum(axis=1)
+
+    # advance bonus when no enemy pawn stands on the next row at col - 1, col or col + 1
+    blockers = enemy_pawns + _shift(enemy_pawns, 0, 1) + _shift(enemy_pawns, 0, -1)
+    rows = np.arange(8)
+    if colour == WHITE:
+        free = _shift(blockers, -1, 0) == 0
+        free[:, 7, :] = False
+        bonus = (7 - rows) * 0.2
+    else:
+        free = _shift(blockers, 1, 0) == 0
+        free[:, 0, :] = False
+        bonus = rows * 0.2
+    return score + ((pawns * free).sum(axis=2) * bonus).sum(axis=1)
+
+
+def king_safety_scores(planes, colour):
+    """Friendly pieces around the king and the pawn in front of it (Engine._evaluate_king_safety)"""
+    _require_numpy()
+    grid = planes.reshape(-1, 12, 8, 8).astype(np.int64)
+    king = grid[:, colour * 6 + KING]
+    own = grid[:, colour * 6:colour * 6 + 6].sum(axis=1)
+    pawns = grid[:, PAWN] + grid[:, 6 + PAWN]
+
+    # friendly pieces on the 8 squares around the king
+    around = sum(_shift(own, dr, dc) for dr in (-1, 0, 1) for dc in (-1, 0, 1) if dr or dc)
+    score = 0.1 * (king * around).sum(axis=(1, 2))
+
+    # no pawn (of either colour) in front of the king
+    if colour == WHITE:
+        exposed = _shift(pawns, 1, 0) == 0
+        exposed[:, 0, :] = False
+    else:
+        exposed = _shift(pawns, -1, 0) == 0
+        exposed[:, 7, :] = False
+    return score - 0.2 * (king * exposed).sum(axis=(1, 2))
+
+
+def static_scores(planes):
+    """Every term of Engine.evaluate that needs no move generation, positive favours white"""
+    return material_scores(planes) \
+        + pawn_structure_scores(planes, WHITE) - pawn_structure_scores(planes, BLACK) \
+        + king_safety_scores(planes, WHITE) - king_safety_scores(planes, BLACK)
@@ -0,0 +1,552 @@
+from piece import *
+from tables import SCORES
+from zobrist import PIECE_KEYS, SIDE_KEY, CASTLING_KEYS, EN_PASSANT_KEYS
+
+# Squares are numbered 0 (a8) to 63 (h1) with white at the bottom, whatever
+# the orientation of the Board the position was built from.
+
+# piece codes: side * 6 + kind (colour and kind codes come from piece.py)
+PIECE_VALUES = (1.0, 3.0, 3.0, 5.0, 9.0, 20000.0)
+
+# move flags
+NORMAL, DOUBLE_PUSH, EN_PASSANT, CASTLE, PROMOTION = range(5)
+
+# castling rights
+WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE = 1, 2, 4, 8
+
+FULL = (1 << 64) - 1
+
+# direction offsets and their (row, col) steps
+NORTH, SOUTH, EAST, WEST = -8, 8, 1, -1
+NORTH_EAST, NORTH_WEST, SOUTH_EAST, SOUTH_WEST = -7, -9, 9, 7
+STEPS = {
+    NORTH: (-1, 0), SOUTH: (1, 0), EAST: (0, 1), WEST: (0, -1),
+    NORTH_EAST: (-1, 1), NORTH_WEST: (-1, -1), SOUTH_EAST: (1, 1), SOUTH_WEST: (1, -1),
+}
+ROOK_DIRECTIONS = (NORTH, EAST, SOUTH, WEST)
+BISHOP_DIRECTIONS = (NORTH_EAST, NORTH_WEST, SOUTH_EAST, SOUTH_WEST)
+
+
+def _leaper_attacks(offsets):
+    table = []
+    for sq in range(64):
+        row, col = divmod(sq, 8)
+        bb = 0
+        for dr, dc in offsets:
+            r, c = row + dr, col + dc
+            if 0 <= r < 8 and 0 <= c < 8:
+                bb |= 1 << (r * 8 + c)
+        table.append(bb)
+    return table
+
+
+def _rays():
+    rays = {}
+    for direction, (dr, dc) in STEPS.items():
+        table = []
+        for sq in range(64):
+            row, col = divmod(sq, 8)
+            bb = 0
+            r, c = row + dr, col + dc
+            while 0 <= r < 8 and 0 <= c < 8:
+                bb |= 1 << (r * 8 + c)
+                r, c = r + dr, c + dc
+            table.append(bb)
+        rays[direction] = table
+    return rays
+
+
+def _between(rays):
+    # squares strictly between two aligned squares
+    table = [[0] * 64 for sq in range(64)]
+    for direction, ray in rays.items():
+        for a in range(64):
+            bb = ray[a]
+            while bb:
+                b = (bb & -bb).bit_length() - 1
+                bb &= bb - 1
+                table[a][b] = ray[a] & ~ray[b] & ~(1 << b)
+    return table
+
+
+KNIGHT_ATTACKS = _leaper_attacks(((-2, 1), (-1, 2), (1, 2), (2, 1), (2, -1), (1, -2), (-1, -2), (-2, -1)))
+KING_ATTACKS = _leaper_attacks(((-1, 0), (-1, 1), (0, 1), (1, 1), (1, 0), (1, -1), (0, -1), (-1, -1)))
+PAWN_ATTACKS = (_leaper_attacks(((-1, -1), (-1, 1))), _leaper_attacks(((1, -1), (1, 1))))
+RAYS = _rays()
+BETWEEN = _between(RAYS)
+
+# castling rights kept when a piece leaves or lands on a square
+CASTLE_MASK = [15] * 64
+CASTLE_MASK[60] = 15 & ~(WHITE_KINGSIDE | WHITE_QUEENSIDE)
+CASTLE_MASK[63] = 15 & ~WHITE_KINGSIDE
+CASTLE_MASK[56] = 15 & ~WHITE_QUEENSIDE
+CASTLE_MASK[4] = 15 & ~(BLACK_KINGSIDE | BLACK_QUEENSIDE)
+CASTLE_MASK[7] = 15 & ~BLACK_KINGSIDE
+CASTLE_MASK[0] = 15 & ~BLACK_QUEENSIDE
+
+# castling: (right, king from, king to, rook from, rook to, must be empty, must not be attacked)
+CASTLES = (
+    (
+        (WHITE_KINGSIDE, 60, 62, 63, 61, (1 << 61) | (1 << 62), (61, 62)),
+        (WHITE_QUEENSIDE, 60, 58, 56, 59, (1 << 57) | (1 << 58) | (1 << 59), (59, 58)),
+    ),
+    (
+        (BLACK_KINGSIDE, 4, 6, 7, 5, (1 << 5) | (1 << 6), (5, 6)),
+        (BLACK_QUEENSIDE, 4, 2, 0, 3, (1 << 1) | (1 << 2) | (1 << 3), (3, 2)),
+    ),
+)
+ROOK_CASTLING = {62: (63, 61), 58: (56, 59), 6: (7, 5), 2: (0, 3)}
+
+
+def _square_scores(start_pieces):
+    # material + piece-square value in centipawns per piece code and square, in the Board's orientation
+    table = []
+    for code in range(12):
+        scores = SCORES[code // 6][code % 6]
+        table.append([scores[sq if start_pieces == "white" else 63 - sq] for sq in range(64)])
+    return table
+
+
+SQUARE_SCORES = {"white": _square_scores("white"), "black": _square_scores("black")}
+
+# zobrist keys per piece code
+ZOBRIST_KEYS = [PIECE_KEYS[code // 6][code % 6] for code in range(12)]
+
+
+def rook_attacks(sq, occupied):
+    attacks = 0
+    for direction in ROOK_DIRECTIONS:
+        ray = RAYS[direction][sq]
+        blockers = ray & occupied
+        if blockers:
+            # nearest blocker: lowest bit going south/east, highest going north/west
+            if direction > 0:
+                first = (blockers & -blockers).bit_length() - 1
+            else:
+                first = blockers.bit_length() - 1
+            ray ^= RAYS[direction][first]
+        attacks |= ray
+    return attacks
+
+
+def bishop_attacks(sq, occupied):
+    attacks = 0
+    for direction in BISHOP_DIRECTIONS:
+        ray = RAYS[direction][sq]
+        blockers = ray & occupied
+        if blockers:
+            if direction > 0:
+                first = (blockers & -blockers).bit_length() - 1
+            else:
+                first = blockers.bit_length() - 1
+            ray ^= RAYS[direction][first]
+        attacks |= ray
+    return attacks
+
+
+class BitBoard:
+    """
+    Bitboard copy of a Board position used by the engine for fast search.
+
+    Implements the same methods the engine calls on Board (legal_moves,
+    make_move, unmake_move, king_square, king_in_check, mvv_lva,
+    material_score); moves are ints and pieces are piece codes.
+    """
+
+    def __init__(self, board):
+        self.start_pieces = board.start_pieces
+        # one bitboard per piece code, occupancy per colour and a square -> piece code map
+        self.pieces = [0] * 12
+        self.occupied = [0, 0]
+        self.mailbox = [-1] * 64
+        self.castle = 0
+        self.en_passant = -1
+        # same key and score as the board (squares are numbered the same way)
+        self.zobrist = board.zobrist
+        self.score = board.score
+        self.scores = SQUARE_SCORES[self.start_pieces]
+
+        for row in range(8):
+            for col in range(8):
+                piece = board.squares[row][col].piece
+                if piece is not None:
+                    sq = self._square(row, col)
+                    code = piece.side * 6 + piece.kind
+                    self.pieces[code] |= 1 << sq
+                    self.occupied[code // 6] |= 1 << sq
+                    self.mailbox[sq] = code
+
+        # castling rights from unmoved kings and rooks on their corners
+        for colour in (WHITE, BLACK):
+            for right, king_from, _, rook_from, _, _, _ in CASTLES[colour]:
+                king = self._piece_at(king_from, board)
+                rook = self._piece_at(rook_from, board)
+                if king is not None and king.kind == KING and not king.moved and rook is not None and rook.kind == ROOK \
+                        and not rook.moved and king.side == rook.side == colour:
+                    self.castle |= right
+
+        # en passant target square behind the pawn that just double stepped
+        if board.en_passant is not None:
+            for row in range(8):
+                for col in range(8):
+                    if board.squares[row][col].piece is board.en_passant:
+                        sq = self._square(row, col)
+                        self.en_passant = sq - 8 if sq < 32 else sq + 8
+
+    # coordinates
+
+    def _square(self, row, col):
+        sq = row * 8 + col
+        return sq if self.start_pieces == "white" else 63 - sq
+
+    def _row_col(self, sq):
+        if self.start_pieces != "white":
+            sq = 63 - sq
+        return divmod(sq, 8)
+
+    def _piece_at(self, sq, board):
+        row, col = self._row_col(sq)
+        return board.squares[row][col].piece
+
+    def move_squares(self, move):
+        # (initial row, initial col, final row, final col) in Board coordinates
+        initial_row, initial_col = self._row_col(move & 63)
+        final_row, final_col = self._row_col((move >> 6) & 63)
+        return initial_row, initial_col, final_row, final_col
+
+    # attacks
+
+    def attackers(self, sq, colour, occupied):
+        # bitboard of pieces of colour (index) attacking sq
+        pieces = self.pieces
+        base = colour * 6
+        return (PAWN_ATTACKS[colour ^ 1][sq] & pieces[base + PAWN]) \
+            | (KNIGHT_ATTACKS[sq] & pieces[base + KNIGHT]) \
+            | (KING_ATTACKS[sq] & pieces[base + KING]) \
+            | (rook_attacks(sq, occupied) & (pieces[base + ROOK] | pieces[base + QUEEN])) \
+            | (bishop_attacks(sq, occupied) & (pieces[base + BISHOP] | pieces[base + QUEEN]))
+
+    def king_square(self, colour):
+        king = self.pieces[colour * 6 + KING]
+        if not king:
+            return None, None
+        return self._row_col(king.bit_length() - 1)
+
+    def piece_list(self):
+        # (side, kind, square) of every piece
+        pieces = []
+        for code, bits in enumerate(self.pieces):
+            while bits:
+                low = bits & -bits
+                bits ^= low
+                pieces.append((code // 6, code % 6, low.bit_length() - 1))
+        return pieces
+
+    def piece_count(self):
+        return bin(self.occupied[WHITE] | self.occupied[BLACK]).count("1")
+
+    def has_non_pawn_material(self, colour):
+        # any piece besides the king and pawns
+        pieces = self.pieces
+        base = colour * 6
+        return bool(pieces[base + KNIGHT] | pieces[base + BISHOP] | pieces[base + ROOK] | pieces[base + QUEEN])
+
+    def king_in_check(self, colour):
+        us = colour
+        king = self.pieces[us * 6 + KING]
+        if not king:
+            return False
+        return self.attackers(king.bit_length() - 1, us ^ 1, self.occupied[0] | self.occupied[1]) != 0
+
+    # move generation
+
+    def legal_moves(self, colour):
+        us = colour
+        them = us ^ 1
+        pieces = self.pieces
+        mailbox = self.mailbox
+        own = self.occupied[us]
+        enemy = self.occupied[them]
+        occupied = own | enemy
+        not_own = FULL ^ own
+        base = us * 6
+        moves = []
+        append = moves.append
+
+        # checkers and pins from the king square
+        king = pieces[base + KING]
+        pinned = {}
+        target = FULL
+        if king:
+            king_sq = king.bit_length() - 1
+            checkers = self.attackers(king_sq, them, occupied)
+            if checkers:
+                if checkers & (checkers - 1):
+                    # double check: only the king can move
+                    target = 0
+                else:
+                    checker_sq = checkers.bit_length() - 1
+                    target = checkers | BETWEEN[king_sq][checker_sq]
+
+            enemy_rooks = pieces[them * 6 + ROOK] | pieces[them * 6 + QUEEN]
+            enemy_bishops = pieces[them * 6 + BISHOP] | pieces[them * 6 + QUEEN]
+            for direction in ROOK_DIRECTIONS + BISHOP_DIRECTIONS:
+                sliders = enemy_rooks if direction in ROOK_DIRECTIONS else enemy_bishops
+                ray = RAYS[direction][king_sq]
+                if not ray & sliders:
+                    continue
+                blockers = ray & occupied
+                if not blockers:
+                    continue
+                first = (blockers & -blockers).bit_length() - 1 if direction > 0 else blockers.bit_length() - 1
+                if not own >> first & 1:
+                    continue
+                blockers = RAYS[direction][first] & occupied
+                if not blockers:
+                    continue
+                second = (blockers & -blockers).bit_length() - 1 if direction > 0 else blockers.bit_length() - 1
+                if sliders >> second & 1:
+                    # squares from the king up to and including the pinner
+                    pinned[first] = ray ^ RAYS[direction][second]
+        else:
+            king_sq = -1
+            checkers = 0
+
+        if target:
+            # pawns
+            code = base + PAWN
+            bb = pieces[code]
+            forward = -8 if us == WHITE else 8
+            start_row = 6 if us == WHITE else 1
+            while bb:
+                low = bb & -bb
+                sq = low.bit_length() - 1
+                bb ^= low
+                allowed = target & pinned.get(sq, FULL)
+                to = sq + forward
+                if not occupied >> to & 1:
+                    promotes = to < 8 or to >= 56
+                    if allowed >> to & 1:
+                        append((code, sq | (to << 6) | (code << 12) | ((PROMOTION if promotes else NORMAL) << 20)))
+                    to2 = to + forward
+                    if sq >> 3 == start_row and not occupied >> to2 & 1 and allowed >> to2 & 1:
+                        append((code, sq | (to2 << 6) | (code << 12) | (DOUBLE_PUSH << 20)))
+                captures = PAWN_ATTACKS[us][sq] & enemy & allowed
+                while captures:
+                    low_to = captures & -captures
+                    to = low_to.bit_length() - 1
+                    captures ^= low_to
+                    flag = PROMOTION if to < 8 or to >= 56 else NORMAL
+                    append((code, sq | (to << 6) | (code << 12) | ((mailbox[to] + 1) << 16) | (flag << 20)))
+                ep = self.en_passant
+                if ep >= 0 and PAWN_ATTACKS[us][sq] >> ep & 1:
+                    captured_sq = ep - forward
+                    if king_sq < 0 or not self._en_passant_exposes(king_sq, them, sq, ep, captured_sq, occupied):
+                        append((code, sq | (ep << 6) | (code << 12) | (EN_PASSANT << 20)))
+
+            # knights, bishops, rooks and queens
+            for kind in (KNIGHT, BISHOP, ROOK, QUEEN):
+                code = base + kind
+                bb = pieces[code]
+                while bb:
+                    low = bb & -bb
+                    sq = low.bit_length() - 1
+                    bb ^= low
+                    if kind == KNIGHT:
+                        attacks = KNIGHT_ATTACKS[sq]
+                    elif kind == BISHOP:
+                        attacks = bishop_attacks(sq, occupied)
+                    elif kind == ROOK:
+                        attacks = rook_attacks(sq, occupied)
+                    else:
+                        attacks = rook_attacks(sq, occupied) | bishop_attacks(sq, occupied)
+                    attacks &= not_own & target
+                    if sq in pinned:
+                        attacks &= pinned[sq]
+                    while attacks:
+                        low_to = attacks & -attacks
+                        to = low_to.bit_length() - 1
+                        attacks ^= low_to
+                        append((code, sq | (to << 6) | (code << 12) | ((mailbox[to] + 1) << 16)))
+
+        # king
+        if king:
+            code = base + KING
+            without_king = occupied ^ king
+            attacks = KING_ATTACKS[king_sq] & not_own
+            while attacks:
+                low_to = attacks & -attacks
+                to = low_to.bit_length() - 1
+                attacks ^= low_to
+                if not self.attackers(to, them, without_king):
+                    append((code, king_sq | (to << 6) | (code << 12) | ((mailbox[to] + 1) << 16)))
+
+            # castling
+            if self.castle and not checkers:
+                for right, king_from, king_to, _, _, empty, safe in CASTLES[us]:
+                    if self.castle & right and king_sq == king_from and not occupied & empty:
+                        if not self.attackers(safe[0], them, occupied) and not self.attackers(safe[1], them, occupied):
+                            append((code, king_from | (king_to << 6) | (code << 12) | (CASTLE << 20)))
+
+        return moves
+
+    def _en_passant_exposes(self, king_sq, them, sq, ep, captured_sq, occupied):
+        # both pawns leave the rank at once, so test the king on the resulting occupancy
+        occupied = occupied ^ (1 << sq) ^ (1 << ep) ^ (1 << captured_sq)
+        pieces = self.pieces
+        base = them * 6
+        if KNIGHT_ATTACKS[king_sq] & pieces[base + KNIGHT]:
+            return True
+        if PAWN_ATTACKS[them ^ 1][king_sq] & pieces[base + PAWN] & ~(1 << captured_sq):
+            return True
+        if rook_attacks(king_sq, occupied) & (pieces[base + ROOK] | pieces[base + QUEEN]):
+            return True
+        if bishop_attacks(king_sq, occupied) & (pieces[base + BISHOP] | pieces[base + QUEEN]):
+            return True
+        return False
+
+    # make / unmake
+
+    def make_move(self, piece, move):
+        initial = move & 63
+        final = (move >> 6) & 63
+        captured = ((move >> 16) & 15) - 1
+        flag = move >> 20
+        pieces = self.pieces
+        occupied = self.occupied
+        mailbox = self.mailbox
+        us = piece // 6
+        undo = (piece, move, self.castle, self.en_passant, self.zobrist, self.score)
+        keys = ZOBRIST_KEYS[piece]
+        key = self.zobrist ^ SIDE_KEY ^ keys[initial] ^ keys[final]
+        scores = self.scores
+        score = self.score + scores[piece][final] - scores[piece][initial]
+
+        move_bb = (1 << initial) | (1 << final)
+        if captured >= 0:
+            pieces[captured] ^= 1 << final
+            occupied[us ^ 1] ^= 1 << final
+            key ^= ZOBRIST_KEYS[captured][final]
+            score -= scores[captured][final]
+        pieces[piece] ^= move_bb
+        occupied[us] ^= move_bb
+        mailbox[initial] = -1
+        mailbox[final] = piece
+
+        if flag == EN_PASSANT:
+            captured_sq = final + 8 if us == WHITE else final - 8
+            pieces[(us ^ 1) * 6 + PAWN] ^= 1 << captured_sq
+            occupied[us ^ 1] ^= 1 << captured_sq
+            mailbox[captured_sq] = -1
+            key ^= ZOBRIST_KEYS[(us ^ 1) * 6 + PAWN][captured_sq]
+            score -= scores[(us ^ 1) * 6 + PAWN][captured_sq]
+        elif flag == CASTLE:
+            rook_from, rook_to = ROOK_CASTLING[final]
+            rook = us * 6 + ROOK
+            rook_bb = (1 << rook_from) | (1 << rook_to)
+            pieces[rook] ^= rook_bb
+            occupied[us] ^= rook_bb
+            mailbox[rook_from] = -1
+            mailbox[rook_to] = rook
+            key ^= ZOBRIST_KEYS[rook][rook_from] ^ ZOBRIST_KEYS[rook][rook_to]
+            score += scores[rook][rook_to] - scores[rook][rook_from]
+        elif flag == PROMOTION:
+            pieces[piece] ^= 1 << final
+            pieces[piece + QUEEN] |= 1 << final
+            mailbox[final] = piece + QUEEN
+            key ^= keys[final] ^ ZOBRIST_KEYS[piece + QUEEN][final]
+            score += scores[piece + QUEEN][final] - scores[piece][final]
+
+        castle = self.castle & CASTLE_MASK[initial] & CASTLE_MASK[final]
+        if castle != self.castle:
+            key ^= CASTLING_KEYS[self.castle] ^ CASTLING_KEYS[castle]
+            self.castle = castle
+        if self.en_passant >= 0:
+            key ^= EN_PASSANT_KEYS[self.en_passant & 7]
+        if flag == DOUBLE_PUSH:
+            self.en_passant = (initial + final) >> 1
+            key ^= EN_PASSANT_KEYS[initial & 7]
+        else:
+            self.en_passant = -1
+        self.zobrist = key
+        self.score = score
+        return undo
+
+    def unmake_move(self, undo):
+        piece, move, self.castle, self.en_passant, self.zobrist, self.score = undo
+        initial = move & 63
+        final = (move >> 6) & 63
+        captured = ((move >> 16) & 15) - 1
+        flag = move >> 20
+        pieces = self.pieces
+        occupied = self.occupied
+        mailbox = self.mailbox
+        us = piece // 6
+
+        if flag == PROMOTION:
+            pieces[piece + QUEEN] ^= 1 << final
+            pieces[piece] |= 1 << final
+        elif flag == CASTLE:
+            rook_from, rook_to = ROOK_CASTLING[final]
+            rook = us * 6 + ROOK
+            rook_bb = (1 << rook_from) | (1 << rook_to)
+            pieces[rook] ^= rook_bb
+            occupied[us] ^= rook_bb
+            mailbox[rook_to] = -1
+            mailbox[rook_from] = rook
+        elif flag == EN_PASSANT:
+            captured_sq = final + 8 if us == WHITE else final - 8
+            pieces[(us ^ 1) * 6 + PAWN] |= 1 << captured_sq
+            occupied[us ^ 1] |= 1 << captured_sq
+            mailbox[captured_sq] = (us ^ 1) * 6 + PAWN
+
+        move_bb = (1 << initial) | (1 << final)
+        pieces[piece] ^= move_bb
+        occupied[us] ^= move_bb
+        mailbox[initial] = piece
+        mailbox[final] = -1
+        if captured >= 0:
+            pieces[captured] |= 1 << final
+            occupied[us ^ 1] |= 1 << final
+            mailbox[final] = captured
+
+    def make_null_move(self):
+        # pass the turn (null-move pruning), only the side to move and en passant change
+        undo = (self.en_passant, self.zobrist)
+        key = self.zobrist ^ SIDE_KEY
+        if self.en_passant >= 0:
+            key ^= EN_PASSANT_KEYS[self.en_passant & 7]
+            self.en_passant = -1
+        self.zobrist = key
+        return undo
+
+    def unmake_null_move(self, undo):
+        self.en_passant, self.zobrist = undo
+
+    # evaluation helpers
+
+    def mvv_lva(self, piece, move):
+        # victim value - attacker value, None for quiet moves
+        captured = ((move >> 16) & 15) - 1
+        if captured < 0:
+            return None
+        return PIECE_VALUES[captured % 6] - PIECE_VALUES[piece % 6]
+
+    def move_key(self, piece, move):
+        # int identifying the move by piece code, from and to square
+        return move & 0xFFFF
+
+    def capture_value(self, piece, move):
+        # value of the piece taken, None for quiet moves
+        captured = ((move >> 16) & 15) - 1
+        if captured < 0:
+            return None
+        return PIECE_VALUES[captured % 6]
+
+    def is_quiet(self, piece, move):
+        # neither a capture (en passant included) nor a promotion
+        return not (move >> 16) & 15 and move >> 20 not in (EN_PASSANT, PROMOTION)
+
+    def material_score(self):
+        # material and piece-square score, positive favours white (kept up to date by make_move)
+        return self.score / 100
@@ -2,72 +2,290 @@ from constants import *
 from square import Square
 from piece import *
 from move import Move
-import copy
+from undo import Undo
+from tables import SCORES
+from zobrist import PIECE_KEYS, SIDE_KEY, CASTLING_KEYS, EN_PASSANT_KEYS
 
 class Board:
 
+    KNIGHT_OFFSETS = ((-2, 1), (-1, 2), (1, 2), (2, 1), (2, -1), (1, -2), (-1, -2), (-2, -1))
+    KING_OFFSETS = ((-1, 0), (-1, 1), (0, 1), (1, 1), (1, 0), (1, -1), (0, -1), (-1, -1))
+    ROOK_DIRECTIONS = ((-1, 0), (0, 1), (1, 0), (0, -1))
+    BISHOP_DIRECTIONS = ((-1, 1), (-1, -1), (1, 1), (1, -1))
+
+    # castling right bit, colour, king square and rook square (numbered as in square_index)
+    CASTLING_RIGHTS = ((1, WHITE, 60, 63), (2, WHITE, 60, 56), (4, BLACK, 4, 7), (8, BLACK, 4, 0))
+
+    # piece classes by FEN letter
+    FEN_PIECES = {"p": Pawn, "n": Knight, "b": Bishop, "r": Rook, "q": Queen, "k": King}
+
     def __init__(self, start_pieces):
         self.squares = [[0, 0, 0, 0, 0, 0, 0, 0] for col in range(COLS)]
         self.last_move = None
+        self.en_passant = None
         self.start_pieces = start_pieces
+        # colour code of the side at the bottom of the screen
+        self.bottom = COLOUR_INDEX[start_pieces]
         self._create()
         self._add_pieces("white")
         self._add_pieces("black")
-        self.checking = False
+        self._track_pieces()
+        self.score = self._compute_score()
+        self.castling_rights = self._castling_rights()
+        self.zobrist = self._compute_zobrist()
+        # FEN move counters: half moves since the last capture or pawn move, and full moves
+        self.halfmove_clock = 0
+        self.fullmove_number = 1
+
+    @classmethod
+    def from_fen(cls, fen, start_pieces="white"):
+        """
+        Board and colour to move for a FEN position, in either orientation
+        Raises ValueError for a malformed FEN; castling rights the king and rooks do not allow are ignored
+        """
+        fields = fen.split()
+        if len(fields) < 4 or len(fields[0].split("/")) != 8 or fields[1] not in ("w", "b"):
+            raise ValueError(f"invalid FEN: {fen}")
+        placement, side, castling, en_passant = fields[:4]
+        board = cls(start_pieces)
+        for row in board.squares:
+            for square in row:
+                square.piece = None
+
+        for rank, pieces in enumerate(placement.split("/")):
+            file = 0
+            for char in pieces:
+                if char in "12345678":
+                    file += int(char)
+                    continue
+                if char.lower() not in cls.FEN_PIECES or file >= 8:
+                    raise ValueError(f"invalid FEN: {fen}")
+                colour = "white" if char.isupper() else "black"
+                kind = cls.FEN_PIECES[char.lower()]
+                piece = Pawn(colour, start_pieces) if kind is Pawn else kind(colour)
+                # pawns off their start rank, kings and rooks until castling says otherwise
+                piece.moved = kind is not Pawn or rank != (6 if colour == "white" else 1)
+                row, col = board.row_col(rank * 8 + file)
+                board.squares[row][col].piece = piece
+                file += 1
+            if file != 8:
+                raise ValueError(f"invalid FEN: {fen}")
+
+        for right, colour, king_sq, rook_sq in cls.CASTLING_RIGHTS:
+            if "KQkq"[right.bit_length() - 1] in castling:
+                pieces = [board.squares[row][col].piece for row, col in (board.row_col(king_sq), board.row_col(rook_sq))]
+                # rights left over in a FEN (common in EPD sets) count only with king and rook at home
+                if [(piece.side, piece.kind) if piece else None for piece in pieces] == [(colour, KING), (colour, ROOK)]:
+                    for piece in pieces:
+                        piece.moved = False
+
+        if en_passant != "-":
+            # the pawn stands one square past the target, the last move was its double step
+            if len(en_passant) != 2 or en_passant[0] not in "abcdefgh" or \
+                    en_passant[1] != ("6" if side == "w" else "3"):
+                raise ValueError(f"invalid en passant square in FEN: {fen}")
+            target = (8 - int(en_passant[1])) * 8 + ord(en_passant[0]) - ord("a")
+            step = 8 if side == "w" else -8
+            row, col = board.row_col(target + step)
+            initial_row, initial_col = board.row_col(target - step)
+            pawn = board.squares[row][col].piece
+            if pawn is None or pawn.kind != PAWN or pawn.side != (BLACK if side == "w" else WHITE):
+                raise ValueError(f"no pawn for the en passant square in FEN: {fen}")
+            pawn.en_passant = True
+            board.en_passant = pawn
+            board.last_move = Move(Square(initial_row, initial_col), Square(row, col))
+
+        board._track_pieces()
+        board.score = board._compute_score()
+        board.castling_rights = board._castling_rights()
+        board.zobrist = board._compute_zobrist(black_to_move=side == "b")
+        if not all(field.isdigit() for field in fields[4:6]):
+            raise ValueError(f"invalid move counters in FEN: {fen}")
+        board.halfmove_clock = int(fields[4]) if len(fields) > 4 else 0
+        board.fullmove_number = int(fields[5]) if len(fields) > 5 else 1
+        return board, WHITE if side == "w" else BLACK
+
+    def to_fen(self, colour):
+        """FEN of the position with colour to move"""
+        ranks = []
+        for rank in range(8):
+            text = ""
+            empty = 0
+            for file in range(8):
+                row, col = self.row_col(rank * 8 + file)
+                piece = self.squares[row][col].piece
+                if piece is None:
+                    empty += 1
+                    continue
+                char = "pnbrqk"[piece.kind]
+                text += (str(empty) if empty else "") + (char.upper() if piece.side == WHITE else char)
+                empty = 0
+            ranks.append(text + (str(empty) if empty else ""))
+
+        castling = "".join("KQkq"[right.bit_length() - 1] for right, _, _, _ in self.CASTLING_RIGHTS
+                           if self.castling_rights & right) or "-"
+        en_passant = "-"
+        if self.en_passant is not None:
+            # the square the pawn passed over
+            row, col = self.last_move.final.row, self.last_move.final.col
+            sq = self.square_index(row, col) + (8 if self.en_passant.side == WHITE else -8)
+            en_passant = "abcdefgh"[sq % 8] + str(8 - sq // 8)
+        return f"{'/'.join(ranks)} {'wb'[colour]} {castling} {en_passant} {self.halfmove_clock} {self.fullmove_number}"
 
     def move(self, piece, move):
+        undo = self.make_move(piece, move)
+
+        # clear valid moves
+        piece.clear_moves()
+
+        # return captured piece (en passant included)
+        return undo.captured
+
+    def make_move(self, piece, move):
         initial = move.initial
         final = move.final
-
-        en_passant_empty = self.squares[final.row][final.col].isempty()
-        
-        # Track captured piece
-        captured_piece = None
-        en_passant_captured = None
+        undo = Undo(piece, move, piece.moved, self.last_move, self.en_passant, self.zobrist, self.castling_rights, self.score,
+                    self.halfmove_clock)
+        key = self.zobrist ^ SIDE_KEY
+        piece_keys = PIECE_KEYS[piece.side][piece.kind]
+        key ^= piece_keys[self.square_index(initial.row, initial.col)]
+        piece_scores = SCORES[piece.side][piece.kind]
+        score = self.score - piece_scores[initial.row * 8 + initial.col]
+
+        # captured piece (en passant captures the pawn beside the initial square)
+        captured = self.squares[final.row][final.col].piece
+        if captured is not None:
+            undo.captured = captured
+            undo.captured_row, undo.captured_col = final.row, final.col
+        elif piece.kind == PAWN and final.col != initial.col:
+            undo.captured = self.squares[initial.row][final.col].piece
+            undo.captured_row, undo.captured_col = initial.row, final.col
+            self.squares[initial.row][final.col].piece = None
+        if undo.captured is not None:
+            self.occupancy[undo.captured.side] ^= 1 << (undo.captured_row * 8 + undo.captured_col)
+            score -= SCORES[undo.captured.side][undo.captured.kind][undo.captured_row * 8 + undo.captured_col]
+            key ^= PIECE_KEYS[undo.captured.side][undo.captured.kind][self.square_index(undo.captured_row, undo.captured_col)]
 
         # console board move update
         self.squares[initial.row][initial.col].piece = None
-        
-        # Check if there's a piece to capture
-        if not en_passant_empty:
-            captured_piece = self.squares[final.row][final.col].piece
-        
         self.squares[final.row][final.col].piece = piece
+        self.occupancy[piece.side] ^= 1 << (initial.row * 8 + initial.col) | 1 << (final.row * 8 + final.col)
+        if piece.kind == KING:
+            self.kings[piece.side] = (final.row, final.col)
+
+        # pawn promotion
+        if piece.kind == PAWN:
+            self.check_promotion(piece, final)
+            promoted = self.squares[final.row][final.col].piece
+            if promoted is not piece:
+                undo.promoted = promoted
+                piece_keys = PIECE_KEYS[promoted.side][promoted.kind]
+                piece_scores = SCORES[promoted.side][promoted.kind]
+        key ^= piece_keys[self.square_index(final.row, final.col)]
+        score += piece_scores[final.row * 8 + final.col]
 
-        if isinstance(piece, Pawn):
-            # en passant capture
+        # king castling
+        if piece.kind == KING and self.castling(initial, final):
             diff = final.col - initial.col
-            if diff != 0 and en_passant_empty:
-                # console board move update
-                en_passant_captured = self.squares[initial.row][initial.col + diff].piece
-                self.squares[initial.row][initial.col + diff].piece = None
-                self.squares[final.row][final.col].piece = piece
-
-            # pawn promotion
-            else:
-                self.check_promotion(piece, final)
-        
+            rook_col = 0 if diff < 0 else 7
+            rook_final_col = final.col + 1 if diff < 0 else final.col - 1
+            rook = self.squares[initial.row][rook_col].piece
+            self.squares[initial.row][rook_col].piece = None
+            self.squares[initial.row][rook_final_col].piece = rook
+            self.occupancy[rook.side] ^= 1 << (initial.row * 8 + rook_col) | 1 << (initial.row * 8 + rook_final_col)
+            rook.moved = True
+            undo.rook = rook
+            undo.rook_initial_col, undo.rook_final_col = rook_col, rook_final_col
+            rook_keys = PIECE_KEYS[rook.side][rook.kind]
+            key ^= rook_keys[self.square_index(initial.row, rook_col)] ^ rook_keys[self.square_index(initial.row, rook_final_col)]
+            rook_scores = SCORES[rook.side][rook.kind]
+            score += rook_scores[initial.row * 8 + rook_final_col] - rook_scores[initial.row * 8 + rook_col]
+
         # move
         piece.moved = True
 
-        # king castling
-        if isinstance(piece, King):
-            if self.castling(initial, final):
-                diff = final.col - initial.col
-                rook = piece.left_rook if (diff < 0) else piece.right_rook
-                if self.checking == False:
-                    # Castling move doesn't capture, so we ignore the return value
-                    _ = self.move(rook, rook.moves[-1])
-
-
-        # clear valid moves
-        piece.clear_moves()
+        # castling rights only change when a king or rook moves or a rook is taken
+        if piece.kind == KING or piece.kind == ROOK or (undo.captured is not None and undo.captured.kind == ROOK):
+            rights = self._castling_rights()
+            key ^= CASTLING_KEYS[self.castling_rights] ^ CASTLING_KEYS[rights]
+            self.castling_rights = rights
+
+        # en passant is only available right after a double pawn step
+        if self.en_passant is not None:
+            key ^= EN_PASSANT_KEYS[self._file(self.last_move.final.col)]
+            self.en_passant.en_passant = False
+            self.en_passant = None
+        if piece.kind == PAWN and abs(final.row - initial.row) == 2:
+            key ^= EN_PASSANT_KEYS[self._file(final.col)]
+            piece.en_passant = True
+            self.en_passant = piece
+
+        self.zobrist = key
+        self.score = score
+        self.halfmove_clock = 0 if piece.kind == PAWN or undo.captured is not None else self.halfmove_clock + 1
+        if piece.side == BLACK:
+            self.fullmove_number += 1
 
         # set last move
         self.last_move = move
-        
-        # Return captured piece (en passant takes priority)
-        return en_passant_captured if en_passant_captured else captured_piece
+
+        return undo
+
+    def unmake_move(self, undo):
+        piece = undo.piece
+        initial = undo.move.initial
+        final = undo.move.final
+
+        # castling rook back to its corner
+        if undo.rook is not None:
+            self.squares[initial.row][undo.rook_final_col].piece = None
+            self.squares[initial.row][undo.rook_initial_col].piece = undo.rook
+            self.occupancy[undo.rook.side] ^= 1 << (initial.row * 8 + undo.rook_final_col) | 1 << (initial.row * 8 + undo.rook_initial_col)
+            undo.rook.moved = False
+
+        # piece back to its initial square (replaces a promoted piece as well)
+        self.squares[final.row][final.col].piece = None
+        self.squares[initial.row][initial.col].piece = piece
+        self.occupancy[piece.side] ^= 1 << (initial.row * 8 + initial.col) | 1 << (final.row * 8 + final.col)
+        if piece.kind == KING:
+            self.kings[piece.side] = (initial.row, initial.col)
+        piece.moved = undo.moved
+
+        # restore captured piece
+        if undo.captured is not None:
+            self.squares[undo.captured_row][undo.captured_col].piece = undo.captured
+            self.occupancy[undo.captured.side] ^= 1 << (undo.captured_row * 8 + undo.captured_col)
+
+        # restore en passant state
+        if self.en_passant is not None:
+            self.en_passant.en_passant = False
+        self.en_passant = undo.en_passant
+        if self.en_passant is not None:
+            self.en_passant.en_passant = True
+
+        self.last_move = undo.last_move
+        self.zobrist = undo.zobrist
+        self.castling_rights = undo.castling_rights
+        self.score = undo.score
+        self.halfmove_clock = undo.halfmove_clock
+        if piece.side == BLACK:
+            self.fullmove_number -= 1
+
+    def make_null_move(self):
+        # pass the turn (null-move pruning), only the side to move and en passant change
+        undo = (self.en_passant, self.zobrist)
+        key = self.zobrist ^ SIDE_KEY
+        if self.en_passant is not None:
+            key ^= EN_PASSANT_KEYS[self._file(self.last_move.final.col)]
+            self.en_passant.en_passant = False
+            self.en_passant = None
+        self.zobrist = key
+        return undo
+
+    def unmake_null_move(self, undo):
+        self.en_passant, self.zobrist = undo
+        if self.en_passant is not None:
+            self.en_passant.en_passant = True
 
     def valid_move(self, piece, move):
         return move in piece.moves
@@ -80,44 +298,329 @@ class Board:
         return abs(initial.col - final.col) == 2
 
     def set_true_en_passant(self, piece):
-        
-        if not isinstance(piece, Pawn):
-            return
+        # en passant flags are kept up to date by make_move, nothing left to do
+        # for callers that still pair it with move()
+        pass
+
+    def in_check(self, piece, move, info=None):
+        # would the move leave the king of the moving side in check ?
+        if info is None:
+            info = self.check_info(piece.side)
+        king_row, king_col, checkers, pins, block = info
+        initial = move.initial
+        final = move.final
+        enemy = piece.side ^ 1
+
+        if piece.kind == KING:
+            # castling: not out of, through or into check
+            if self.castling(initial, final):
+                if checkers:
+                    return True
+                step = 1 if final.col > initial.col else -1
+                return self.is_attacked(initial.row, initial.col + step, enemy) or \
+                    self.is_attacked(final.row, final.col, enemy)
+
+            # lift the king so sliders see through its current square
+            self.squares[initial.row][initial.col].piece = None
+            attacked = self.is_attacked(final.row, final.col, enemy)
+            self.squares[initial.row][initial.col].piece = piece
+            return attacked
+
+        # no king on the board (nothing to protect)
+        if king_row is None:
+            return False
+
+        # double check: only the king can move
+        if len(checkers) > 1:
+            return True
+
+        # en passant removes two pawns from the same rank, try it on the board
+        if piece.kind == PAWN and final.col != initial.col and self.squares[final.row][final.col].isempty():
+            undo = self.make_move(piece, move)
+            attacked = self.is_attacked(king_row, king_col, enemy)
+            self.unmake_move(undo)
+            return attacked
+
+        # pinned pieces can only move along the pin line
+        pin = pins.get((initial.row, initial.col))
+        if pin is not None:
+            dr, dc = pin
+            if (final.row - king_row) * dc != (final.col - king_col) * dr:
+                return True
+
+        # single check: capture the checker or block the line
+        if block is not None and (final.row, final.col) not in block:
+            return True
+
+        return False
+
+    def check_info(self, colour):
+        # king square, checkers, pinned pieces and squares that stop a single check
+        king_row, king_col = self.king_square(colour)
+        if king_row is None:
+            return None, None, [], {}, None
+
+        enemy = colour ^ 1
+        checkers = []
+        pins = {}
+        block = None
+
+        # pawn and knight checks
+        dir = self._pawn_dir(enemy)
+        for dc in (-1, 1):
+            r, c = king_row - dir, king_col + dc
+            if Square.in_range(r, c):
+                p = self.squares[r][c].piece
+                if p is not None and p.kind == PAWN and p.side == enemy:
+                    checkers.append((r, c))
+                    block = {(r, c)}
+        for dr, dc in self.KNIGHT_OFFSETS:
+            r, c = king_row + dr, king_col + dc
+            if Square.in_range(r, c):
+                p = self.squares[r][c].piece
+                if p is not None and p.kind == KNIGHT and p.side == enemy:
+                    checkers.append((r, c))
+                    block = {(r, c)}
+
+        # slider checks and pins along the 8 lines from the king
+        for dr, dc in self.ROOK_DIRECTIONS + self.BISHOP_DIRECTIONS:
+            slider = ROOK if dr == 0 or dc == 0 else BISHOP
+            line = []
+            shield = None
+            r, c = king_row + dr, king_col + dc
+            while Square.in_range(r, c):
+                line.append((r, c))
+                p = self.squares[r][c].piece
+                if p is not None:
+                    if p.side == colour:
+                        # second own piece: nothing can be pinned on this line
+                        if shield is not None:
+                            break
+                        shield = (r, c)
+                    else:
+                        if p.kind == slider or p.kind == QUEEN:
+                            if shield is None:
+                                checkers.append((r, c))
+                                block = set(line)
+                            else:
+                                pins[shield] = (dr, dc)
+                        break
+                r, c = r + dr, c + dc
+
+        return king_row, king_col, checkers, pins, block
+
+    def is_attacked(self, row, col, colour):
+        # is the square attacked by a piece of the given colour ?
+        squares = self.squares
+
+        # pawns
+        r = row - self._pawn_dir(colour)
+        if Square.in_range(r):
+            for c in (col - 1, col + 1):
+                if Square.in_range(c):
+                    p = squares[r][c].piece
+                    if p is not None and p.kind == PAWN and p.side == colour:
+                        return True
+
+        # knights
+        for dr, dc in self.KNIGHT_OFFSETS:
+            r, c = row + dr, col + dc
+            if Square.in_range(r, c):
+                p = squares[r][c].piece
+                if p is not None and p.kind == KNIGHT and p.side == colour:
+                    return True
+
+        # king
+        for dr, dc in self.KING_OFFSETS:
+            r, c = row + dr, col + dc
+            if Square.in_range(r, c):
+                p = squares[r][c].piece
+                if p is not None and p.kind == KING and p.side == colour:
+                    return True
+
+        # sliders
+        for directions, slider in ((self.ROOK_DIRECTIONS, ROOK), (self.BISHOP_DIRECTIONS, BISHOP)):
+            for dr, dc in directions:
+                r, c = row + dr, col + dc
+                while Square.in_range(r, c):
+                    p = squares[r][c].piece
+                    if p is not None:
+                        if (p.kind == slider or p.kind == QUEEN) and p.side == colour:
+                            return True
+                        break
+                    r, c = r + dr, c + dc
 
+        return False
+
+    def king_in_check(self, colour):
+        king_row, king_col = self.king_square(colour)
+        if king_row is None:
+            return False
+        return self.is_attacked(king_row, king_col, colour ^ 1)
+
+    def king_square(self, colour):
+        king = self.kings[colour]
+        if king is None:
+            return None, None
+        return king
+
+    def piece_list(self):
+        # (side, kind, square numbered as in square_index) of every piece
+        pieces = []
+        for side in (WHITE, BLACK):
+            bits = self.occupancy[side]
+            while bits:
+                low = bits & -bits
+                bits ^= low
+                row, col = divmod(low.bit_length() - 1, 8)
+                pieces.append((side, self.squares[row][col].piece.kind, self.square_index(row, col)))
+        return pieces
+
+    def piece_count(self):
+        return bin(self.occupancy[WHITE] | self.occupancy[BLACK]).count("1")
+
+    def has_non_pawn_material(self, colour):
+        # any piece besides the king and pawns
+        bits = self.occupancy[colour]
+        while bits:
+            low = bits & -bits
+            bits ^= low
+            row, col = divmod(low.bit_length() - 1, 8)
+            if self.squares[row][col].piece.kind not in (PAWN, KING):
+                return True
+        return False
+
+    def piece_squares(self, colour):
+        # (row, col) of every piece of the colour, in board order
+        bits = self.occupancy[colour]
+        while bits:
+            low = bits & -bits
+            bits ^= low
+            yield divmod(low.bit_length() - 1, 8)
+
+    def legal_moves(self, colour):
+        # all legal (piece, move) pairs, checkers and pins computed once
+        info = self.check_info(colour)
+        moves = []
+        for row, col in self.piece_squares(colour):
+            piece = self.squares[row][col].piece
+            piece.clear_moves()
+            self.calc_moves(piece, row, col, bool=True, info=info)
+            for move in piece.moves:
+                moves.append((piece, move))
+        return moves
+
+    def mvv_lva(self, piece, move):
+        # victim value - attacker value, None for quiet moves
+        captured = self.squares[move.final.row][move.final.col].piece
+        if captured is None:
+            return None
+        return abs(captured.value) - abs(piece.value)
+
+    def move_key(self, piece, move):
+        # int identifying the move by piece code, from and to square (row * 8 + col)
+        return (piece.side * 6 + piece.kind) << 12 | (move.final.row * 8 + move.final.col) << 6 | (move.initial.row * 8 + move.initial.col)
+
+    def capture_value(self, piece, move):
+        # value of the piece taken, None for quiet moves (en passant included, as in mvv_lva)
+        captured = self.squares[move.final.row][move.final.col].piece
+        if captured is None:
+            return None
+        return abs(captured.value)
+
+    def is_quiet(self, piece, move):
+        # neither a capture (en passant included) nor a promotion
+        if piece.kind == PAWN and (move.final.col != move.initial.col or move.final.row in (0, 7)):
+            return False
+        return self.squares[move.final.row][move.final.col].piece is None
+
+    def material_score(self):
+        # material and piece-square score, positive favours white (kept up to date by make_move)
+        return self.score / 100
+
+    def square_index(self, row, col):
+        # square number with white at the bottom (0 = a8, 63 = h1) in both orientations
+        sq = row * 8 + col
+        return sq if self.start_pieces == "white" else 63 - sq
+
+    def row_col(self, sq):
+        # inverse of square_index
+        return divmod(sq if self.start_pieces == "white" else 63 - sq, 8)
+
+    def square_name(self, row, col):
+        # algebraic name of a square ("e4") in both orientations
+        sq = self.square_index(row, col)
+        return "abcdefgh"[sq % 8] + str(8 - sq // 8)
+
+    def move_squares(self, move):
+        # (initial row, initial col, final row, final col)
+        return move.initial.row, move.initial.col, move.final.row, move.final.col
+
+    def _file(self, col):
+        # file of a column (0 = a) in both orientations
+        return col if self.start_pieces == "white" else 7 - col
+
+    def _track_pieces(self):
+        # occupancy bits (row * 8 + col) per colour and king squares, make_move keeps them up to date
+        self.occupancy = [0, 0]
+        self.kings = [None, None]
         for row in range(ROWS):
             for col in range(COLS):
-                if isinstance(self.squares[row][col].piece, Pawn):
-                    self.squares[row][col].piece.en_passant = False
-        
-        piece.en_passant = True
-
-    def in_check(self, piece, move):
-        self.checking = True
-        temp_piece = copy.deepcopy(piece)
-        temp_board = copy.deepcopy(self)
-        temp_board.move(temp_piece, move)
+                piece = self.squares[row][col].piece
+                if piece is not None:
+                    self.occupancy[piece.side] |= 1 << (row * 8 + col)
+                    if piece.kind == KING:
+                        self.kings[piece.side] = (row, col)
+
+    def _castling_rights(self):
+        rights = 0
+        for right, colour, king_sq, rook_sq in self.CASTLING_RIGHTS:
+            king_row, king_col = self.row_col(king_sq)
+            rook_row, rook_col = self.row_col(rook_sq)
+            king = self.squares[king_row][king_col].piece
+            rook = self.squares[rook_row][rook_col].piece
+            if king is not None and king.kind == KING and king.side == colour and not king.moved and \
+                    rook is not None and rook.kind == ROOK and rook.side == colour and not rook.moved:
+                rights |= right
+        return rights
+
+    def _compute_score(self):
+        # material and piece-square score in centipawns, make_move keeps it up to date afterwards
+        score = 0
+        for row, col in self.piece_squares(WHITE):
+            piece = self.squares[row][col].piece
+            score += SCORES[WHITE][piece.kind][row * 8 + col]
+        for row, col in self.piece_squares(BLACK):
+            piece = self.squares[row][col].piece
+            score += SCORES[BLACK][piece.kind][row * 8 + col]
+        return score
+
+    def _compute_zobrist(self, black_to_move=False):
+        # full zobrist key of the position, move() keeps it up to date afterwards
+        key = SIDE_KEY if black_to_move else 0
         for row in range(ROWS):
             for col in range(COLS):
-                if temp_board.squares[row][col].has_enemy_piece(piece.colour):
-                    p = temp_board.squares[row][col].piece
-                    temp_board.calc_moves(p, row, col, bool=False)
-                    for m in p.moves:
-                        if m.final.has_piece() and isinstance(m.final.piece, King) and m.final.piece.colour == piece.colour:
-                            self.checking = False
-                            p.clear_moves()
-                            return True
-                    p.clear_moves()
-                    
-        self.checking = False
-        return False
+                piece = self.squares[row][col].piece
+                if piece is not None:
+                    key ^= PIECE_KEYS[piece.side][piece.kind][self.square_index(row, col)]
+        key ^= CASTLING_KEYS[self.castling_rights]
+        if self.en_passant is not None:
+            key ^= EN_PASSANT_KEYS[self._file(self.last_move.final.col)]
+        return key
 
+    def _pawn_dir(self, colour):
+        # pawns of the colour at the bottom of the screen move up
+        return -1 if colour == self.bottom else 1
 
+    def calc_moves(self, piece, row, col, bool=True, info=None):
 
-        
-        
+        # checkers and pins are shared by every move of the piece
+        if bool and info is None:
+            info = self.check_info(piece.side)
+
+        # every move of the piece starts from the same (shared) square
+        origin = Square(row, col)
 
-    def calc_moves(self, piece, row, col, bool=True):
-        
         def pawn_moves():
             # steps
             steps = 1 if piece.moved else 2
@@ -129,14 +632,14 @@ class Board:
                 if Square.in_range(possible_move_row):
                     if self.squares[possible_move_row][col].isempty():
                         # create initial and final move squares
-                        initial = Square(row, col)
+                        initial = origin
                         final = Square(possible_move_row, col)
                         # create a new move
                         move = Move(initial, final)
 
                         # check potential checks
                         if bool:
-                            if not self.in_check(piece, move):
+                            if not self.in_check(piece, move, info):
                                 # append new move
                                 piece.add_move(move)
                         else:
@@ -152,9 +655,9 @@ class Board:
             possible_move_cols = [col-1, col+1]
             for possible_move_col in possible_move_cols:
                 if Square.in_range(possible_move_row, possible_move_col):
-                    if self.squares[possible_move_row][possible_move_col].has_enemy_piece(piece.colour):
+                    if self.squares[possible_move_row][possible_move_col].has_enemy_piece(piece.side):
                         # create initial and final move squares
-                        initial = Square(row, col)
+                        initial = origin
                         final_piece = self.squares[possible_move_row][possible_move_col].piece
                         final = Square(possible_move_row, possible_move_col, final_piece)
                         # create a new move
@@ -162,7 +665,7 @@ class Board:
                         
                         # check potential checks
                         if bool:
-                            if not self.in_check(piece, move):
+                            if not self.in_check(piece, move, info):
                                 # append new move
                                 piece.add_move(move)
                         else:
@@ -170,23 +673,23 @@ class Board:
                             piece.add_move(move)
 
             # en passant moves
-            r = 3 if piece.colour == "white" else 4
-            fr = 2 if piece.colour == "white" else 5
+            r = 3 if piece.dir == -1 else 4
+            fr = r + piece.dir
             # left en pessant
             if Square.in_range(col-1) and row == r:
-                if self.squares[row][col-1].has_enemy_piece(piece.colour):
+                if self.squares[row][col-1].has_enemy_piece(piece.side):
                     p = self.squares[row][col-1].piece
-                    if isinstance(p, Pawn):
+                    if p.kind == PAWN:
                         if p.en_passant:
                             # create initial and final move squares
-                            initial = Square(row, col)
+                            initial = origin
                             final = Square(fr, col-1, p)
                             # create a new move
                             move = Move(initial, final)
                             
                             # check potential checks
                             if bool:
-                                if not self.in_check(piece, move):
+                                if not self.in_check(piece, move, info):
                                     # append new move
                                     piece.add_move(move)
                             else:
@@ -195,19 +698,19 @@ class Board:
             
             # right en pessant
             if Square.in_range(col+1) and row == r:
-                if self.squares[row][col+1].has_enemy_piece(piece.colour):
+                if self.squares[row][col+1].has_enemy_piece(piece.side):
                     p = self.squares[row][col+1].piece
-                    if isinstance(p, Pawn):
+                    if p.kind == PAWN:
                         if p.en_passant:
                             # create initial and final move squares
-                            initial = Square(row, col)
+                            initial = origin
                             final = Square(fr, col+1, p)
                             # create a new move
                             move = Move(initial, final)
                             
                             # check potential checks
                             if bool:
-                                if not self.in_check(piece, move):
+                                if not self.in_check(piece, move, info):
                                     # append new move
                                     piece.add_move(move)
                             else:
@@ -232,9 +735,9 @@ class Board:
                 possible_move_row, possible_move_col = possible_move
 
                 if Square.in_range(possible_move_row, possible_move_col):
-                    if self.squares[possible_move_row][possible_move_col].isempty_or_enemy(piece.colour):
+                    if self.squares[possible_move_row][possible_move_col].isempty_or_enemy(piece.side):
                         # create squares of the new move
-                        initial = Square(row, col)
+                        initial = origin
                         final_piece = self.squares[possible_move_row][possible_move_col].piece
                         final = Square(possible_move_row, possible_move_col, final_piece)
                         # create new move
@@ -242,7 +745,7 @@ class Board:
                         
                         # check potential checks
                         if bool:
-                            if not self.in_check(piece, move):
+                            if not self.in_check(piece, move, info):
                                 # append new move
                                 piece.add_move(move)
                         else:
@@ -258,7 +761,7 @@ class Board:
                 while True:
                     if Square.in_range(possible_move_row, possible_move_col):
                         # create squares of the possible new move
-                        initial = Square(row, col)
+                        initial = origin
                         final_piece = self.squares[possible_move_row][possible_move_col].piece
                         final = Square(possible_move_row, possible_move_col, final_piece)
                         # create a possible new move
@@ -268,7 +771,7 @@ class Board:
                         if self.squares[possible_move_row][possible_move_col].isempty():
                             # check potential checks
                             if bool:
-                                if not self.in_check(piece, move):
+                                if not self.in_check(piece, move, info):
                                     # append new move
                                     piece.add_move(move)
                             else:
@@ -276,10 +779,10 @@ class Board:
                                 piece.add_move(move)
 
                         # has enemy piece = add move + break
-                        elif self.squares[possible_move_row][possible_move_col].has_enemy_piece(piece.colour):
+                        elif self.squares[possible_move_row][possible_move_col].has_enemy_piece(piece.side):
                             # check potential checks
                             if bool:
-                                if not self.in_check(piece, move):
+                                if not self.in_check(piece, move, info):
                                     # append new move
                                     piece.add_move(move)
                             else:
@@ -288,7 +791,7 @@ class Board:
                             break
 
                         # has team piece = break
-                        elif self.squares[possible_move_row][possible_move_col].has_team_piece(piece.colour):
+                        elif self.squares[possible_move_row][possible_move_col].has_team_piece(piece.side):
                             break
                     
                     # not in range
@@ -315,15 +818,15 @@ class Board:
                 possible_move_row, possible_move_col = possible_move
 
                 if Square.in_range(possible_move_row, possible_move_col):
-                    if self.squares[possible_move_row][possible_move_col].isempty_or_enemy(piece.colour):
+                    if self.squares[possible_move_row][possible_move_col].isempty_or_enemy(piece.side):
                         # create squares of the new move
-                        initial = Square(row, col)
+                        initial = origin
                         final = Square(possible_move_row, possible_move_col) # piece=piece
                         # create new move
                         move = Move(initial, final)
                         # check potential checks
                         if bool:
-                            if not self.in_check(piece, move):
+                            if not self.in_check(piece, move, info):
                                 # append new move
                                 piece.add_move(move)
                         else:
@@ -334,16 +837,16 @@ class Board:
             if not piece.moved:
                 # queen castling
                 left_rook = self.squares[row][0].piece
-                if isinstance(left_rook, Rook):
+                if left_rook is not None and left_rook.kind == ROOK:
                     if not left_rook.moved:
-                        for c in range(1, 4):
+                        for c in range(1, col):
                             # castling is not possible because there are pieces in between ?
                             if self.squares[row][c].has_piece():
                                 break
                                 
                             if self.start_pieces == "white":
 
-                                if c == 2:
+                                if c == col - 1:
                                     # adds left rook to king
                                     piece.left_rook = left_rook
 
@@ -353,13 +856,13 @@ class Board:
                                     moveR = Move(initial, final)
 
                                     # king move
-                                    initial = Square(row, col)
+                                    initial = origin
                                     final = Square(row, 2)
                                     moveK = Move(initial, final)
 
                                     # check potential checks
                                     if bool:
-                                        if not self.in_check(piece, moveK) and not self.in_check(left_rook, moveR):
+                                        if not self.in_check(piece, moveK, info) and not self.in_check(left_rook, moveR, info):
                                             # append new move to rook
                                             left_rook.add_move(moveR)
                                             # append new move to king
@@ -370,7 +873,7 @@ class Board:
                                         # append new move king
                                         piece.add_move(moveK)
                             elif self.start_pieces == "black":
-                                if c == 1:
+                                if c == col - 1:
                                     # adds left rook to king
                                     piece.left_rook = left_rook
 
@@ -380,13 +883,13 @@ class Board:
                                     moveR = Move(initial, final)
 
                                     # king move
-                                    initial = Square(row, col)
+                                    initial = origin
                                     final = Square(row, 1)
                                     moveK = Move(initial, final)
 
                                     # check potential checks
                                     if bool:
-                                        if not self.in_check(piece, moveK) and not self.in_check(left_rook, moveR):
+                                        if not self.in_check(piece, moveK, info) and not self.in_check(left_rook, moveR, info):
                                             # append new move to rook
                                             left_rook.add_move(moveR)
                                             # append new move to king
@@ -400,9 +903,9 @@ class Board:
 
                 # king castling
                 right_rook = self.squares[row][7].piece
-                if isinstance(right_rook, Rook):
+                if right_rook is not None and right_rook.kind == ROOK:
                     if not right_rook.moved:
-                        for c in range(5, 7):
+                        for c in range(col + 1, 7):
                             # castling is not possible because there are pieces in between ?
                             if self.squares[row][c].has_piece():
                                 break
@@ -418,13 +921,13 @@ class Board:
                                     moveR = Move(initial, final)
 
                                     # king move
-                                    initial = Square(row, col)
+                                    initial = origin
                                     final = Square(row, 6)
                                     moveK = Move(initial, final)
 
                                     # check potential checks
                                     if bool:
-                                        if not self.in_check(piece, moveK) and not self.in_check(right_rook, moveR):
+                                        if not self.in_check(piece, moveK, info) and not self.in_check(right_rook, moveR, info):
                                             # append new move to rook
                                             right_rook.add_move(moveR)
                                             # append new move to king
@@ -435,7 +938,7 @@ class Board:
                                         # append new move king
                                         piece.add_move(moveK)
                             elif self.start_pieces == "black":
-                                if c == 5:
+                                if c == 6:
                                     # adds right rook to king
                                     piece.right_rook = right_rook
 
@@ -445,13 +948,13 @@ class Board:
                                     moveR = Move(initial, final)
 
                                     # king move
-                                    initial = Square(row, col)
+                                    initial = origin
                                     final = Square(row, 5)
                                     moveK = Move(initial, final)
 
                                     # check potential checks
                                     if bool:
-                                        if not self.in_check(piece, moveK) and not self.in_check(right_rook, moveR):
+                                        if not self.in_check(piece, moveK, info) and not self.in_check(right_rook, moveR, info):
                                             # append new move to rook
                                             right_rook.add_move(moveR)
                                             # append new move to king
@@ -464,13 +967,13 @@ class Board:
 
 
 
-        if isinstance(piece, Pawn): 
+        if piece.kind == PAWN:
             pawn_moves()
 
-        elif isinstance(piece, Knight): 
+        elif piece.kind == KNIGHT:
             knight_moves()
 
-        elif isinstance(piece, Bishop): 
+        elif piece.kind == BISHOP:
             straightline_moves([
                 (-1, 1), # up-right
                 (-1, -1), # up-left
@@ -478,7 +981,7 @@ class Board:
                 (1, -1), # down-left
             ])
 
-        elif isinstance(piece, Rook): 
+        elif piece.kind == ROOK:
             straightline_moves([
                 (-1, 0), # up
                 (0, 1), # right
@@ -486,7 +989,7 @@ class Board:
                 (0, -1), # left
             ])
 
-        elif isinstance(piece, Queen): 
+        elif piece.kind == QUEEN:
             straightline_moves([
                 (-1, 1), # up-right
                 (-1, -1), # up-left
@@ -498,7 +1001,7 @@ class Board:
                 (0, -1) # left
             ])
 
-        elif isinstance(piece, King): 
+        elif piece.kind == KING:
             king_moves()
 
     def _create(self):
@@ -0,0 +1,144 @@
+"""
+Opening book: the moves played from known positions, looked up by Zobrist key.
+
+The book is a file of fixed-width big-endian records sorted by key
+
+    key     8 bytes   Board.zobrist of the position
+    move    2 bytes   from square | to square << 6 (0 = a8 ... 63 = h1, white at the bottom)
+    weight  2 bytes   how often the move was played (scaled by the game results)
+
+so a lookup is a binary search over the memory-mapped file. Keys and squares
+are the same for both board orientations.
+
+    python book.py build games.pgn book.bin --plies 16   # book from a PGN collection
+    python book.py probe book.bin                        # book moves of the start position
+"""
+import argparse
+import mmap
+import random
+import struct
+import sys
+
+from board import Board
+from square import Square
+from move import Move
+from piece import *
+from pgn import read_games, replay
+
+RECORD = struct.Struct(">QHH")
+
+# Weight of a move by the result of the game for the side that played it
+RESULT_WEIGHTS = {"1-0": (2, 0), "0-1": (0, 2), "1/2-1/2": (1, 1), "*": (1, 1)}
+
+
+class OpeningBook:
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # an empty file cannot be mapped, an empty book has no moves anyway
+            self._data = b""
+        self.size = len(self._data) // RECORD.size
+
+    def close(self):
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._file.close()
+
+    def entries(self, key):
+        """(from square, to square, weight) of every book move of a position"""
+        data = self._data
+        # first record with this key or a larger one
+        low, high = 0, self.size
+        while low < high:
+            middle = (low + high) // 2
+            if RECORD.unpack_from(data, middle * RECORD.size)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        entries = []
+        while low < self.size:
+            entry_key, move, weight = RECORD.unpack_from(data, low * RECORD.size)
+            if entry_key != key:
+                break
+            entries.append((move & 63, move >> 6, weight))
+            low += 1
+        return entries
+
+    def moves(self, board, colour):
+        """(piece, move, weight) of the book moves on a board, colour to move"""
+        moves = []
+        for initial, final, weight in self.entries(board.zobrist):
+            initial_row, initial_col = board.row_col(initial)
+            final_row, final_col = board.row_col(final)
+            piece = board.squares[initial_row][initial_col].piece
+            # no move generation, the key already identifies the position
+            if piece is not None and piece.side == colour:
+                moves.append((piece, Move(Square(initial_row, initial_col), Square(final_row, final_col)), weight))
+        return moves
+
+    def choose(self, board, colour, rng=random):
+        """A book move (piece, move) picked with probability proportional to its weight, None out of book"""
+        moves = self.moves(board, colour)
+        if not moves:
+            return None
+        piece, move, weight = rng.choices(moves, weights=[weight for _, _, weight in moves])[0]
+        return piece, move
+
+
+def build(pgn_paths, book_path, plies=16):
+    """Write a book of the first plies of every game of the PGN files, returns the number of records"""
+    weights = {}
+    for pgn_path in pgn_paths:
+        for game in read_games(pgn_path):
+            for ply, (board, colour, piece, move) in enumerate(replay(game)):
+                if ply == plies:
+                    break
+                record = (board.zobrist, board.square_index(move.initial.row, move.initial.col) |
+                          board.square_index(move.final.row, move.final.col) << 6)
+                weights[record] = weights.get(record, 0) + RESULT_WEIGHTS.get(game.result, (1, 1))[colour]
+
+    # moves of lost games only keep their place when nothing better was played
+    records = sorted((key, move, weight) for (key, move), weight in weights.items())
+    best = {}
+    for key, move, weight in records:
+        best[key] = max(best.get(key, 0), weight)
+    records = [(key, move, weight or (0 if best[key] else 1)) for key, move, weight in records]
+    scale = max([weight for _, _, weight in records] + [0xFFFF]) / 0xFFFF
+
+    with open(book_path, "wb") as f:
+        for key, move, weight in records:
+            if weight:
+                f.write(RECORD.pack(key, move, max(1, int(weight / scale))))
+    return sum(1 for _, _, weight in records if weight)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or probe an opening book")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build_parser = commands.add_parser("build", help="build a book from PGN files")
+    build_parser.add_argument("pgn", nargs="+", help="PGN files")
+    build_parser.add_argument("book", help="book file to write")
+    build_parser.add_argument("--plies", type=int, default=16, help="half moves of each game to keep (default: 16)")
+    probe_parser = commands.add_parser("probe", help="list the book moves of the start position")
+    probe_parser.add_argument("book", help="book file")
+    probe_parser.add_argument("--start-pieces", choices=["white", "black"], default="white")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        print(f"{build(args.pgn, args.book, args.plies)} book moves written to {args.book}")
+        return 0
+
+    book = OpeningBook(args.book)
+    board = Board(args.start_pieces)
+    for piece, move, weight in book.moves(board, WHITE):
+        print(board.square_name(move.initial.row, move.initial.col) + board.square_name(move.final.row, move.final.col), weight)
+    book.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -16,16 +16,15 @@ class Dragger:
 
     def update_blit(self, surface):
         # texture
-        self.piece.set_texture(size=128)
-        texture = self.piece.texture
         # img - use cached image (lazy import to avoid circular dependency)
         from game import Game
+        texture = Game.texture(self.piece)
         img = Game.get_cached_image(texture, 70)
         # rect
         img_center = (self.mouseX, self.mouseY)
-        self.piece.texture_rect = img.get_rect(center=img_center)
+        texture_rect = img.get_rect(center=img_center)
         # blit
-        surface.blit(img, self.piece.texture_rect)
+        surface.blit(img, texture_rect)
 
     # other methods
 
@@ -1,387 +1,810 @@
 import copy
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait
+
 from constants import *
 from board import Board
+from bitboard import BitBoard
 from square import Square
 from move import Move
 from piece import *
+from tables import *
+from stats import SearchStats
+import batch
 
 class Engine:
-    # Transposition table for caching evaluated positions
-    _transposition_table = {}
-    _table_size = 10000  # Limit table size to prevent memory issues
-    
-    # Piece-square tables for positional evaluation
-    # Values are from white's perspective (row 0-7, col 0-7)
-    PAWN_TABLE = [
-        [0,  0,  0,  0,  0,  0,  0,  0],
-        [0.5, 0.5, 0.5, 0.5, 0.5, 0.5, 0.5, 0.5],
-        [0.1, 0.1, 0.2, 0.3, 0.3, 0.2, 0.1, 0.1],
-        [0.05, 0.05, 0.1, 0.25, 0.25, 0.1, 0.05, 0.05],
-        [0,  0,  0,  0.2, 0.2,  0,  0,  0],
-        [0.05, -0.05, -0.1,  0,  0, -0.1, -0.05, 0.05],
-        [0.05, 0.1, 0.1, -0.2, -0.2, 0.1, 0.1, 0.05],
-        [0,  0,  0,  0,  0,  0,  0,  0]
-    ]
-    
-    KNIGHT_TABLE = [
-        [-0.5, -0.4, -0.3, -0.3, -0.3, -0.3, -0.4, -0.5],
-        [-0.4, -0.2,  0,  0,  0,  0, -0.2, -0.4],
-        [-0.3,  0, 0.1, 0.15, 0.15, 0.1,  0, -0.3],
-        [-0.3, 0.05, 0.15, 0.2, 0.2, 0.15, 0.05, -0.3],
-        [-0.3,  0, 0.15, 0.2, 0.2, 0.15,  0, -0.3],
-        [-0.3, 0.05, 0.1, 0.15, 0.15, 0.1, 0.05, -0.3],
-        [-0.4, -0.2,  0, 0.05, 0.05,  0, -0.2, -0.4],
-        [-0.5, -0.4, -0.3, -0.3, -0.3, -0.3, -0.4, -0.5]
-    ]
-    
-    BISHOP_TABLE = [
-        [-0.2, -0.1, -0.1, -0.1, -0.1, -0.1, -0.1, -0.2],
-        [-0.1,  0,  0,  0,  0,  0,  0, -0.1],
-        [-0.1,  0, 0.05, 0.1, 0.1, 0.05,  0, -0.1],
-        [-0.1, 0.05, 0.05, 0.1, 0.1, 0.05, 0.05, -0.1],
-        [-0.1,  0, 0.1, 0.1, 0.1, 0.1,  0, -0.1],
-        [-0.1, 0.1, 0.1, 0.1, 0.1, 0.1, 0.1, -0.1],
-        [-0.1, 0.05,  0,  0,  0,  0, 0.05, -0.1],
-        [-0.2, -0.1, -0.1, -0.1, -0.1, -0.1, -0.1, -0.2]
-    ]
-    
-    ROOK_TABLE = [
-        [0,  0,  0,  0,  0,  0,  0,  0],
-        [0.05, 0.1, 0.1, 0.1, 0.1, 0.1, 0.1, 0.05],
-        [-0.05,  0,  0,  0,  0,  0,  0, -0.05],
-        [-0.05,  0,  0,  0,  0,  0,  0, -0.05],
-        [-0.05,  0,  0,  0,  0,  0,  0, -0.05],
-        [-0.05,  0,  0,  0,  0,  0,  0, -0.05],
-        [-0.05,  0,  0,  0,  0,  0,  0, -0.05],
-        [0,  0,  0, 0.05, 0.05,  0,  0,  0]
-    ]
-    
-    QUEEN_TABLE = [
-        [-0.2, -0.1, -0.1, -0.05, -0.05, -0.1, -0.1, -0.2],
-        [-0.1,  0,  0,  0,  0,  0,  0, -0.1],
-        [-0.1,  0, 0.05, 0.05, 0.05, 0.05,  0, -0.1],
-        [-0.05,  0, 0.05, 0.05, 0.05, 0.05,  0, -0.05],
-        [0,  0, 0.05, 0.05, 0.05, 0.05,  0,  0],
-        [-0.1, 0.05, 0.05, 0.05, 0.05, 0.05, 0.05, -0.1],
-        [-0.1,  0, 0.05,  0,  0, 0.05,  0, -0.1],
-        [-0.2, -0.1, -0.1, -0.05, -0.05, -0.1, -0.1, -0.2]
-    ]
-    
-    KING_TABLE_MIDDLE = [
-        [-0.3, -0.4, -0.4, -0.5, -0.5, -0.4, -0.4, -0.3],
-        [-0.3, -0.4, -0.4, -0.5, -0.5, -0.4, -0.4, -0.3],
-        [-0.3, -0.4, -0.4, -0.5, -0.5, -0.4, -0.4, -0.3],
-        [-0.3, -0.4, -0.4, -0.5, -0.5, -0.4, -0.4, -0.3],
-        [-0.2, -0.3, -0.3, -0.4, -0.4, -0.3, -0.3, -0.2],
-        [-0.1, -0.2, -0.2, -0.2, -0.2, -0.2, -0.2, -0.1],
-        [0.2, 0.2,  0,  0,  0,  0, 0.2, 0.2],
-        [0.2, 0.3, 0.1,  0,  0, 0.1, 0.3, 0.2]
-    ]
-    
-    def __init__(self, depth=2):
+    # Transposition table for caching searched positions (slots indexed by zobrist key)
+    _table_size = 1 << 18  # Limit table size to prevent memory issues
+    
+    # Transposition table bound types
+    EXACT = 0
+    LOWER_BOUND = 1
+    UPPER_BOUND = 2
+    
+    # Deepest iteration of a timed search
+    MAX_DEPTH = 64
+    # Nodes between two clock checks in a timed search
+    CLOCK_CHECK_NODES = 256
+    # Killer moves kept per ply
+    KILLER_SLOTS = 2
+    # Quiescence search: skip captures that leave the score this far (in centipawns) below alpha
+    DELTA_MARGIN = 200
+    # Aspiration window (centipawns) around the previous depth's score, full window once it grew past the limit
+    ASPIRATION_WINDOW = 50
+    ASPIRATION_LIMIT = 1000
+    # Score (centipawns) of a tablebase win, less the plies to mate; mates found by the search stay infinite
+    TABLEBASE_WIN = 100000
+    # Null-move pruning: depth reduction of the search after passing the turn
+    NULL_MOVE_REDUCTION = 2
+    # Late move reductions: quiet moves from this index on are searched one ply shallower
+    # when at least LMR_MIN_DEPTH plies remain
+    LMR_MOVE_INDEX = 3
+    LMR_MIN_DEPTH = 3
+    
+    # Piece-square tables for positional evaluation (see tables.py)
+    PAWN_TABLE = PAWN_TABLE
+    KNIGHT_TABLE = KNIGHT_TABLE
+    BISHOP_TABLE = BISHOP_TABLE
+    ROOK_TABLE = ROOK_TABLE
+    QUEEN_TABLE = QUEEN_TABLE
+    KING_TABLE_MIDDLE = KING_TABLE_MIDDLE
+    PIECE_SQUARE_TABLES = PIECE_SQUARE_TABLES
+    PIECE_VALUES = PIECE_VALUES
+    
+    def __init__(self, depth=2, backend="board", check_evasions=True,
+                 null_move=True, late_move_reductions=True, lmr_research=True, workers=1, book=None,
+                 tablebases=None):
         """
         Initialize the chess engine:
-        - depth: Main search depth (default: 2)
+        - depth: Main search depth (default: 2), followed by a quiescence search of captures
+        - backend: "board" searches the Board itself, "bitboard" searches a BitBoard copy of it
+        - check_evasions: search every evasion (not only captures) when in check during quiescence
+        - null_move: prune when passing the turn still fails high (not in check or pawn-only endgames)
+        - late_move_reductions: search late quiet moves one ply shallower
+        - lmr_research: search a reduced move again at full depth when it fails high
+        - workers: processes sharing the root moves (1 = search in this process only)
+        - book: OpeningBook whose moves are played without searching (None = always search)
+        - tablebases: Tablebases giving the exact result of positions with few pieces (None = search them)
         """
         self.depth = depth
-        # Clear transposition table for new game
-        Engine._transposition_table.clear()
+        self.backend = backend
+        self.check_evasions = check_evasions
+        self.null_move = null_move
+        self.late_move_reductions = late_move_reductions
+        self.lmr_research = lmr_research
+        self.workers = workers
+        self.book = book
+        self.tablebases = tablebases
+        # Worker processes of a parallel search, started by the first search that needs them
+        self._pool = None
+        # Thread running the searches started by search_async
+        self._thread = None
+        # Fresh transposition table for new game
+        self._transposition_table = [None] * self._table_size
+        # Move ordering: quiet moves that caused a cutoff, per ply (killers) and per piece/from/to (history)
+        self._killers = [[] for ply in range(self.MAX_DEPTH + 1)]
+        self._history = [0] * (12 * 64 * 64)
+        # Beta cutoffs counted by the index of the move that caused them (index 0 = first move searched)
+        self.cutoffs = []
+        # Counters of the last search (SearchStats), its cutoffs are self.cutoffs
+        self.stats = SearchStats()
+        # Boards copied by search_async and ponder for the search they start
+        self._copies = 0
+        # Nodes visited by the last search and quiescence nodes among them
+        self.nodes = 0
+        self.qnodes = 0
+        # Deepest fully searched iteration of the last search
+        self.completed_depth = 0
+        # Clock of a timed search: deadline (time.time()) and whether it (or the node limit) was reached
+        self.deadline = None
+        self.stopped = False
+        # Nodes the running search may visit (None = no limit)
+        self.node_limit = None
+        # Limits of the running search, changed by ponder_hit: deepest iteration and time after
+        # which no new iteration starts
+        self._depth_limit = 0
+        self._soft_deadline = None
+        self._start = None
+        # Whether ponder already set the start and limits of the next search, which keeps them
+        self._limits_set = False
+        # Principal variation of the last search as (initial row, initial col, final row, final col)
+        self.pv = []
+        # Opponent move the running ponder search assumes, None when not pondering
+        self.ponder_move = None
+        # Called with (depth, score) after each depth a search completes, self.pv already
+        # holding its principal variation (None = no reports)
+        self.info = None
     
-    def search(self, board, colour, depth=None):
+    def search(self, board, colour, depth=None, time_limit=None, node_limit=None):
         """
-        Simple minimax search with alpha-beta pruning
-        Returns the best move for the given colour
+        Principal variation search (negamax with alpha-beta pruning)
+        Returns the best move for the given colour (WHITE or BLACK), self.stats holds the
+        counters of the search (SearchStats)
+        - depth: search depth (default: self.depth, or MAX_DEPTH with a time or node limit)
+        - time_limit: seconds to think; depth 1, 2, ... are searched in turn, each in an
+          aspiration window around the previous score, and the best move of the last
+          depth completed in time is returned
+        - node_limit: nodes to visit, deepening as with a time limit
         """
+        limited = time_limit is not None or node_limit is not None
         if depth is None:
-            depth = self.depth
+            depth = self.MAX_DEPTH if limited else self.depth
+        limits_set, self._limits_set = self._limits_set, False
+        self.nodes = 0
+        self.qnodes = 0
+        self.cutoffs = []
+        self.stats = SearchStats()
+        self.stats.cutoffs = self.cutoffs
+        self.stats.board_copies, self._copies = self._copies, 0
+        if not limits_set:
+            self.completed_depth = 0
+            self.stopped = False
+            self._start = time.time()
+        
+        # Known opening position: play a book move, no search needed
+        if self.book is not None:
+            book_move = self.book.choose(board, colour)
+            if book_move is not None:
+                self.pv = [board.move_squares(book_move[1])]
+                self._finish_stats("book")
+                return book_move
+        
+        # Few pieces left: the tablebases know the best move
+        if self.tablebases is not None and board.piece_count() <= self.tablebases.MAX_PIECES:
+            tablebase_move = self._tablebase_move(board, colour)
+            if tablebase_move is not None:
+                self.pv = [board.move_squares(tablebase_move[1])]
+                self._finish_stats("tablebases")
+                return tablebase_move
+        
+        # Killers belong to this search, history is kept but counts less than fresh cutoffs
+        self._killers = [[] for ply in range(self.MAX_DEPTH + 1)]
+        self._history = [value >> 1 for value in self._history]
+        if not limits_set:
+            self._set_limits(depth, time_limit)
+            self.node_limit = node_limit
+        
+        # Search a bitboard copy when selected, the result is mapped back to the board
+        position = board
+        if self.backend == "bitboard":
+            position = BitBoard(board)
+            self.stats.board_copies += 1
         
         # Get all possible moves
-        all_moves = self._get_all_moves(board, colour)
+        all_moves = self._get_all_moves(position, colour)
         
         if not all_moves:
+            self._finish_stats("search")
             return None
         
         # Order moves for better alpha-beta pruning
-        all_moves = self._order_moves(board, all_moves)
+        all_moves = self._order_moves(position, all_moves)
+        
+        # Iterative deepening with a time or node limit (a depth cut short is thrown away),
+        # a single search otherwise
+        best_move = all_moves[0]
+        value = None
+        d = 1 if limited else depth
+        depth_start = time.time()
+        while d <= self._depth_limit:
+            move, value = self._aspiration_search(position, colour, d, all_moves, value)
+            if self.stopped:
+                # Quiescence can keep even depth 1 from finishing, take its best move so far
+                if self.completed_depth == 0 and move is not None:
+                    best_move = move
+                break
+            best_move = move
+            self.completed_depth = d
+            now = time.time()
+            self.stats.depth_times.append(now - depth_start)
+            depth_start = now
+            if self.info is not None:
+                self.pv = self._principal_variation(position, colour, best_move)
+                self.info(d, value)
+            
+            # Search the best move first at the next depth
+            all_moves.insert(0, all_moves.pop(all_moves.index(best_move)))
+            
+            # Stop at a forced mate, or when the next depth would not finish in time
+            if value in (float('inf'), float('-inf')):
+                break
+            if self._soft_deadline is not None and time.time() > self._soft_deadline:
+                break
+            d += 1
+        self.deadline = None
+        self.node_limit = None
+        self.pv = self._principal_variation(position, colour, best_move)
+        self._finish_stats("search")
+        
+        if position is not board:
+            best_move = self._board_move(board, colour, position, best_move[1])
         
+        return best_move
+    
+    def _finish_stats(self, source):
+        """Complete self.stats at the end of a search"""
+        stats = self.stats
+        stats.source = source
+        stats.depth = self.completed_depth
+        stats.elapsed = time.time() - self._start
+        stats.nodes = self.nodes
+        stats.qnodes = self.qnodes
+    
+    def _tablebase_move(self, board, colour):
+        """Fastest mate, or slowest defeat, according to the tablebases; None when a position is missing"""
         best_move = None
-        best_value = float('-inf') if colour == "white" else float('inf')
-        alpha = float('-inf')
-        beta = float('inf')
+        best_value = float('-inf')
+        for piece, move in board.legal_moves(colour):
+            undo = board.make_move(piece, move)
+            result = self.tablebases.probe(board, colour ^ 1)
+            board.unmake_move(undo)
+            if result is None:
+                return None
+            value = -self._tablebase_score(result)
+            if value > best_value:
+                best_value = value
+                best_move = (piece, move)
+        return best_move
+    
+    def _tablebase_score(self, result):
+        """Search score of a tablebase (result, plies to mate) for the side to move"""
+        outcome, plies = result
+        return outcome * (self.TABLEBASE_WIN - plies)
+    
+    def _set_limits(self, depth, time_limit):
+        """Deepest iteration and deadlines of the running search, time counted from its start"""
+        self._depth_limit = depth
+        if time_limit is None:
+            self.deadline = self._soft_deadline = None
+        else:
+            self.deadline = self._start + time_limit
+            # The next depth takes longer than all the previous ones together, do not start it past half the time
+            self._soft_deadline = self._start + time_limit / 2
+    
+    def _budget_spent(self):
+        """Whether the deadline or the node limit of the running search is reached"""
+        return ((self.deadline is not None and time.time() >= self.deadline) or
+                (self.node_limit is not None and self.nodes >= self.node_limit))
+    
+    def _principal_variation(self, position, colour, best_move):
+        """Best move followed by the best replies stored in the transposition table, as move squares"""
+        pv = [position.move_squares(best_move[1])]
+        undos = [position.make_move(*best_move)]
+        seen = {position.zobrist}
+        colour ^= 1
+        while len(pv) < max(self.completed_depth, 2):
+            entry = self._probe(position.zobrist)
+            if entry is None:
+                break
+            moves = [(piece, move) for piece, move in self._get_all_moves(position, colour)
+                     if position.move_key(piece, move) == entry[4]]
+            if not moves:
+                break
+            pv.append(position.move_squares(moves[0][1]))
+            undos.append(position.make_move(*moves[0]))
+            # A repetition would go round forever
+            if position.zobrist in seen:
+                break
+            seen.add(position.zobrist)
+            colour ^= 1
+        for undo in reversed(undos):
+            position.unmake_move(undo)
+        return pv
+    
+    def search_async(self, board, colour, depth=None, time_limit=None):
+        """
+        Start search() in a background thread, returns a concurrent.futures.Future of its best move
+        The engine searches a copy of the board, so the caller can keep drawing the board meanwhile
+        A search not yet started can be cancelled through the future, stop() ends a running one
+        """
+        if self._thread is None:
+            self._thread = ThreadPoolExecutor(max_workers=1)
+        self._copies += 1
+        return self._thread.submit(self.search, copy.deepcopy(board), colour, depth, time_limit)
+    
+    def stop(self, future=None):
+        """
+        End the running search early, it returns the best move found so far
+        - future: the search_async or ponder future to end, returns once it is over. A search not
+          started yet is cancelled, one just starting would clear the flag, so it is set until the end
+        """
+        self.stopped = True
+        self.ponder_move = None
+        if future is None:
+            return
+        if future.cancel():
+            self._limits_set = False
+            return
+        while not future.done():
+            self.stopped = True
+            wait([future], timeout=0.01)
+    
+    def ponder(self, board, colour, move=None):
+        """
+        Think on the opponent's time: search in the background the position after the opponent's
+        expected move (by default the reply in the principal variation of the last search)
+        - colour: the opponent, to move on the board
+        - move: the expected move as (initial row, initial col, final row, final col)
+        Returns a Future like search_async (None without an expected move). The search goes on
+        until ponder_hit gives it limits or stop() drops it; its transposition table entries are kept
+        either way
+        """
+        if move is None:
+            if len(self.pv) < 2:
+                return None
+            move = self.pv[1]
+        board = copy.deepcopy(board)
+        self._copies += 1
+        for piece, board_move in board.legal_moves(colour):
+            if board.move_squares(board_move) == move:
+                board.make_move(piece, board_move)
+                break
+        else:
+            return None
         
-        for piece, move in all_moves:
-            # Make the move on a copy of the board
-            temp_board = copy.deepcopy(board)
-            
-            # Get the piece directly from the copied board using move coordinates
-            if not temp_board.squares[move.initial.row][move.initial.col].has_piece():
-                continue
-            
-            temp_piece = temp_board.squares[move.initial.row][move.initial.col].piece
+        self.ponder_move = move
+        if self._thread is None:
+            self._thread = ThreadPoolExecutor(max_workers=1)
+        self.prepare_ponder()
+        return self._thread.submit(self.search, board, colour ^ 1, self.MAX_DEPTH, float('inf'))
+    
+    def prepare_ponder(self):
+        """
+        Start the clock of the next search and give it no limits, for a ponder search run by the
+        caller (ponder does this itself). The limits are set before the search rather than by it,
+        so a ponder_hit coming before the search thread starts is not overwritten
+        """
+        self._start = time.time()
+        self.completed_depth = 0
+        self.stopped = False
+        self._set_limits(self.MAX_DEPTH, float('inf'))
+        self.node_limit = None
+        self._limits_set = True
+    
+    def ponder_hit(self, depth=None, time_limit=None, node_limit=None):
+        """
+        The opponent played the expected move: the ponder search becomes the real search, with the
+        usual limits (as for search) counted from the start of pondering. When the opponent took
+        longer than that, the move of the deepest iteration already completed comes back at once
+        """
+        if depth is None:
+            depth = self.depth if time_limit is None and node_limit is None else self.MAX_DEPTH
+        self.ponder_move = None
+        self._set_limits(depth, time_limit)
+        self.node_limit = node_limit
+        if self.completed_depth >= depth:
+            self.stopped = True
+    
+    def first_move_cutoff_rate(self):
+        """Share of the beta cutoffs of the last search caused by the first move searched"""
+        total = sum(self.cutoffs)
+        return self.cutoffs[0] / total if total else 0.0
+    
+    def time_for_move(self, time_remaining, move_number):
+        """
+        Seconds to spend on the next move given the clock and the move number:
+        an even share of the time left over the moves expected before the end of the game
+        """
+        # About 40 moves more in the opening, never planning for fewer than 20
+        moves_to_go = max(20, 40 - move_number)
+        return time_remaining / moves_to_go
+    
+    def _aspiration_search(self, position, colour, depth, all_moves, previous):
+        """
+        Root search in a narrow window around the previous depth's score
+        The window widens and the depth is searched again when the score falls outside it
+        """
+        infinity = float('inf')
+        if previous is None or previous in (infinity, -infinity):
+            return self._search_root(position, colour, depth, all_moves, -infinity, infinity)
+        
+        delta = self.ASPIRATION_WINDOW
+        alpha, beta = previous - delta, previous + delta
+        while True:
+            move, value = self._search_root(position, colour, depth, all_moves, alpha, beta)
+            if self.stopped:
+                return move, value
+            delta *= 4
+            if value <= alpha:
+                alpha = previous - delta if delta < self.ASPIRATION_LIMIT else -infinity
+            elif value >= beta:
+                beta = previous + delta if delta < self.ASPIRATION_LIMIT else infinity
+            else:
+                return move, value
+    
+    def _search_root(self, position, colour, depth, all_moves, alpha, beta):
+        """
+        One fixed depth search of the root moves, returns (best move, value) for the side to move
+        When the clock stops the search, the best of the moves searched so far
+        """
+        if self.workers > 1 and len(all_moves) > 1:
+            return self._search_root_parallel(position, colour, depth, all_moves, alpha, beta)
+        
+        best_move = None
+        best_value = float('-inf')
+        
+        for index, (piece, move) in enumerate(all_moves):
+            value = self._search_move(position, colour, depth, piece, move, alpha, beta, index == 0)
+            if self.stopped:
+                # Out of time, keep what the fully searched moves gave
+                break
             
-            # Verify it's the right piece
-            if temp_piece.name != piece.name or temp_piece.colour != piece.colour:
-                continue
+            # Update best move (the first move even when every move gets mated)
+            if best_move is None or value > best_value:
+                best_value = value
+                best_move = (piece, move)
             
-            # Calculate moves for the temp piece
-            temp_piece.clear_moves()
-            temp_board.calc_moves(temp_piece, move.initial.row, move.initial.col, bool=True)
+            # Alpha-beta pruning
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+        
+        return best_move, best_value
+    
+    def _search_move(self, position, colour, depth, piece, move, alpha, beta, first):
+        """Value of one root move: full window for the first move, zero window (re-searched on fail high) for the others"""
+        # Make the move in place
+        undo = position.make_move(piece, move)
+        
+        opponent_colour = colour ^ 1
+        if first:
+            value = -self._negamax(position, opponent_colour, depth - 1, -beta, -alpha, 1)
+        else:
+            value = -self._negamax(position, opponent_colour, depth - 1, -alpha - 1, -alpha, 1)
+            if alpha < value < beta:
+                value = -self._negamax(position, opponent_colour, depth - 1, -beta, -alpha, 1)
+        
+        # Take the move back
+        position.unmake_move(undo)
+        return value
+    
+    def _search_root_parallel(self, position, colour, depth, all_moves, alpha, beta):
+        """
+        _search_root with the root moves shared by the worker processes
+        The first move is searched here to set alpha, the others in rounds of one move per worker,
+        each round with the alpha left by the previous one. Results are taken in move order, so the
+        best move is the one the serial search picks (moves failing low on an older alpha fail low anyway)
+        """
+        pool = self._executor()
+        piece, move = all_moves[0]
+        best_value = self._search_move(position, colour, depth, piece, move, alpha, beta, True)
+        if self.stopped:
+            return None, float('-inf')
+        best_move = (piece, move)
+        alpha = max(alpha, best_value)
+        
+        rest = all_moves[1:]
+        for start in range(0, len(rest), self.workers):
+            if alpha >= beta:
+                break
+            batch = rest[start:start + self.workers]
+            futures = [pool.submit(_search_worker_move, position, colour, position.move_squares(move),
+                                   depth, alpha, beta, self.deadline)
+                       for piece, move in batch]
+            results = [future.result() for future in futures]
             
-            # Find the corresponding move
-            temp_move = None
-            for m in temp_piece.moves:
-                if m.final.row == move.final.row and m.final.col == move.final.col:
-                    temp_move = m
+            for (piece, move), (value, nodes, qnodes, stopped, stats) in zip(batch, results):
+                self.nodes += nodes
+                self.qnodes += qnodes
+                self.stopped = self.stopped or stopped
+                self.stats.merge(stats)
+            # Workers do not know the node limit, it ends the search between rounds
+            if self.node_limit is not None and self.nodes >= self.node_limit:
+                self.stopped = True
+            for (piece, move), (value, nodes, qnodes, stopped, stats) in zip(batch, results):
+                if stopped:
+                    # Out of time, keep the moves before the first one cut short
                     break
-            
-            if not temp_move:
-                continue
-            
-            # Make the move
-            temp_board.move(temp_piece, temp_move)
-            temp_board.set_true_en_passant(temp_piece)
-            
-            # Evaluate the position
-            if depth == 1:
-                # Direct evaluation at leaf nodes
-                value = self._fast_evaluate(temp_board, colour)
-            else:
-                # Recursive search
-                opponent_colour = "black" if colour == "white" else "white"
-                _, value = self._minimax(temp_board, opponent_colour, depth - 1, alpha, beta, False)
-            
-            # Update best move
-            if colour == "white":
                 if value > best_value:
                     best_value = value
                     best_move = (piece, move)
                 alpha = max(alpha, value)
-            else:
-                if value < best_value:
-                    best_value = value
-                    best_move = (piece, move)
-                beta = min(beta, value)
-            
-            # Alpha-beta pruning
-            if alpha >= beta:
+                if alpha >= beta:
+                    break
+            if self.stopped:
                 break
         
-        return best_move
+        return best_move, best_value
+    
+    def _search_worker(self, position, colour, squares, depth, alpha, beta, deadline):
+        """Worker side of _search_root_parallel: (value, nodes, quiescence nodes, stopped, stats) of one root move"""
+        self.nodes = 0
+        self.qnodes = 0
+        self.cutoffs = []
+        self.stats = SearchStats()
+        self.stats.cutoffs = self.cutoffs
+        self.stopped = False
+        self.deadline = deadline
+        self._killers = [[] for ply in range(self.MAX_DEPTH + 1)]
+        for piece, move in self._get_all_moves(position, colour):
+            if position.move_squares(move) == squares:
+                value = self._search_move(position, colour, depth, piece, move, alpha, beta, False)
+                return value, self.nodes, self.qnodes, self.stopped, self.stats
+        raise ValueError(f"no legal move {squares}")
+    
+    def _executor(self):
+        """Process pool of the parallel search, each worker keeps an engine (and its transposition table)"""
+        if self._pool is None:
+            options = dict(depth=self.depth, check_evasions=self.check_evasions, null_move=self.null_move,
+                           late_move_reductions=self.late_move_reductions, lmr_research=self.lmr_research,
+                           tablebases=self.tablebases)
+            self._pool = ProcessPoolExecutor(self.workers, initializer=_start_worker, initargs=(options,))
+        return self._pool
     
-    def _minimax(self, board, colour, depth, alpha, beta, maximizing):
+    def close(self):
+        """Stop the worker processes of a parallel search"""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+    
+    def _board_move(self, board, colour, position, move):
+        """Find the (piece, move) pair of the board matching a move of the bitboard copy"""
+        squares = position.move_squares(move)
+        for piece, board_move in board.legal_moves(colour):
+            if board.move_squares(board_move) == squares:
+                return piece, board_move
+        return None
+    
+    def _negamax(self, board, colour, depth, alpha, beta, ply, allow_null=True):
         """
-        Minimax algorithm with alpha-beta pruning
+        Negamax principal variation search with alpha-beta pruning and a transposition table
+        Scores (centipawns) are from the perspective of the side to move
         """
         if depth == 0:
-            # Direct evaluation at leaf nodes
-            return None, self._fast_evaluate(board, "white" if maximizing else "black")
+            # Resolve captures before evaluating the leaf
+            return self._quiesce(board, colour, alpha, beta)
+        
+        self.nodes += 1
+        # Timed or node-limited search: look at the budget now and then, unwind as soon as it is spent
+        if self.nodes % self.CLOCK_CHECK_NODES == 0 and self._budget_spent():
+            self.stopped = True
+        if self.stopped:
+            return 0
+        
+        # Exact result from the tablebases once few pieces are left
+        if self.tablebases is not None and board.piece_count() <= self.tablebases.MAX_PIECES:
+            result = self.tablebases.probe(board, colour)
+            if result is not None:
+                return self._tablebase_score(result)
+        
+        # Reuse the result of a previous search of this position if it is deep enough
+        key = board.zobrist
+        entry = self._probe(key)
+        hash_move = None
+        if entry is not None:
+            _, entry_depth, bound, score, hash_move = entry
+            if entry_depth >= depth and (bound == self.EXACT or
+                                         (bound == self.LOWER_BOUND and score >= beta) or
+                                         (bound == self.UPPER_BOUND and score <= alpha)):
+                return score
+        alpha_start = alpha
+        in_check = self._is_in_check(board, colour)
+        
+        # Null move: if the opponent cannot reach beta even with a free move, neither can a real
+        # move (a zero window search away from the principal variation). Zugzwang makes this wrong,
+        # so not in check, not twice in a row, and not with only king and pawns left
+        if (self.null_move and allow_null and not in_check and beta - alpha == 1 and
+                depth > self.NULL_MOVE_REDUCTION and self._score(board, colour) >= beta and
+                board.has_non_pawn_material(colour)):
+            undo = board.make_null_move()
+            value = -self._negamax(board, colour ^ 1, depth - 1 - self.NULL_MOVE_REDUCTION,
+                                   -beta, -beta + 1, ply + 1, False)
+            board.unmake_null_move(undo)
+            if self.stopped:
+                return 0
+            if value >= beta:
+                return beta
         
         all_moves = self._get_all_moves(board, colour)
         
         if not all_moves:
-            # Checkmate or stalemate - evaluate endgame
-            eval_score = self.evaluate(board, "white" if maximizing else "black")
-            # Penalize checkmate heavily
-            if self._is_in_check(board, colour):
-                eval_score = float('-inf') if maximizing else float('inf')
-            return None, eval_score
+            # Checkmate is penalized heavily, stalemate is a draw
+            if in_check:
+                return float('-inf')
+            return 0
         
         # Order moves for better pruning
-        all_moves = self._order_moves(board, all_moves)
+        all_moves = self._order_moves(board, all_moves, ply, hash_move)
         
-        if maximizing:
-            max_value = float('-inf')
-            best_move = None
+        best_value = float('-inf')
+        best_move = None
+        opponent_colour = colour ^ 1
+        for index, (piece, move) in enumerate(all_moves):
+            # Captures are told apart before the move, when the victim is still on its square
+            quiet = board.is_quiet(piece, move)
+            undo = board.make_move(piece, move)
             
-            for piece, move in all_moves:
-                temp_board = copy.deepcopy(board)
-                
-                # Get the piece directly from the copied board
-                if not temp_board.squares[move.initial.row][move.initial.col].has_piece():
-                    continue
-                
-                temp_piece = temp_board.squares[move.initial.row][move.initial.col].piece
-                
-                # Verify it's the right piece
-                if temp_piece.name != piece.name or temp_piece.colour != piece.colour:
-                    continue
-                
-                temp_piece.clear_moves()
-                temp_board.calc_moves(temp_piece, move.initial.row, move.initial.col, bool=True)
-                
-                temp_move = self._find_move_in_piece(temp_piece, move.final.row, move.final.col)
-                if not temp_move:
-                    continue
-                
-                temp_board.move(temp_piece, temp_move)
-                temp_board.set_true_en_passant(temp_piece)
-                
-                opponent_colour = "black" if colour == "white" else "white"
-                _, value = self._minimax(temp_board, opponent_colour, depth - 1, alpha, beta, False)
-                
-                if value > max_value:
-                    max_value = value
-                    best_move = (piece, move)
+            if index == 0:
+                # Principal variation: full window
+                value = -self._negamax(board, opponent_colour, depth - 1, -beta, -alpha, ply + 1)
+            else:
+                # Late quiet moves are unlikely to be best: search them shallower unless they give check
+                reduction = 0
+                if (self.late_move_reductions and index >= self.LMR_MOVE_INDEX and
+                        depth >= self.LMR_MIN_DEPTH and not in_check and
+                        quiet and not board.king_in_check(opponent_colour)):
+                    reduction = 1
                 
-                alpha = max(alpha, value)
+                # Zero window: only prove the move is no better than alpha
+                value = -self._negamax(board, opponent_colour, depth - 1 - reduction, -alpha - 1, -alpha, ply + 1)
+                if reduction and value > alpha and self.lmr_research:
+                    # The reduced search failed high, verify at full depth
+                    value = -self._negamax(board, opponent_colour, depth - 1, -alpha - 1, -alpha, ply + 1)
+                if alpha < value < beta:
+                    # Fail high: the move may be better after all, search it with the full window
+                    value = -self._negamax(board, opponent_colour, depth - 1, -beta, -alpha, ply + 1)
+            
+            board.unmake_move(undo)
+            if self.stopped:
+                return 0
+            
+            # The first move stays best when every move gets mated
+            if best_move is None or value > best_value:
+                best_value = value
+                best_move = (piece, move)
+            
+            if value > alpha:
+                alpha = value
                 if alpha >= beta:
+                    self._record_cutoff(board, piece, move, index, ply, depth)
                     break
-            
-            return best_move, max_value
+        
+        self._store(key, depth, best_value, alpha_start, beta, board.move_key(*best_move))
+        return best_value
+    
+    def _quiesce(self, board, colour, alpha, beta):
+        """
+        Quiescence search: only captures (and evasions when in check) until the position is quiet
+        The side to move may stand pat on the static evaluation instead of capturing
+        """
+        self.nodes += 1
+        self.qnodes += 1
+        if self.nodes % self.CLOCK_CHECK_NODES == 0 and self._budget_spent():
+            self.stopped = True
+        if self.stopped:
+            return 0
+        
+        all_moves = self._get_all_moves(board, colour)
+        if self.check_evasions and self._is_in_check(board, colour):
+            # No standing pat in check, every evasion is searched
+            if not all_moves:
+                return float('-inf')
+            moves = [(None, piece, move) for piece, move in self._order_moves(board, all_moves)]
+            best = float('-inf')
         else:
-            min_value = float('inf')
-            best_move = None
+            stand_pat = self._score(board, colour)
+            if stand_pat >= beta:
+                return stand_pat
+            alpha = max(alpha, stand_pat)
+            best = stand_pat
             
+            # Captures, most valuable victim first (least valuable attacker among equals)
+            moves = []
             for piece, move in all_moves:
-                temp_board = copy.deepcopy(board)
-                
-                # Get the piece directly from the copied board
-                if not temp_board.squares[move.initial.row][move.initial.col].has_piece():
-                    continue
-                
-                temp_piece = temp_board.squares[move.initial.row][move.initial.col].piece
-                
-                # Verify it's the right piece
-                if temp_piece.name != piece.name or temp_piece.colour != piece.colour:
-                    continue
-                
-                temp_piece.clear_moves()
-                temp_board.calc_moves(temp_piece, move.initial.row, move.initial.col, bool=True)
-                
-                temp_move = self._find_move_in_piece(temp_piece, move.final.row, move.final.col)
-                if not temp_move:
-                    continue
-                
-                temp_board.move(temp_piece, temp_move)
-                temp_board.set_true_en_passant(temp_piece)
-                
-                opponent_colour = "black" if colour == "white" else "white"
-                _, value = self._minimax(temp_board, opponent_colour, depth - 1, alpha, beta, True)
-                
-                if value < min_value:
-                    min_value = value
-                    best_move = (piece, move)
-                
-                beta = min(beta, value)
-                if beta <= alpha:
-                    break
+                value = board.capture_value(piece, move)
+                if value is not None:
+                    moves.append((value, piece, move))
+            moves.sort(key=lambda x: (x[0], board.mvv_lva(x[1], x[2])), reverse=True)
+        
+        for value, piece, move in moves:
+            # Delta pruning: even winning the piece for free would not reach alpha
+            if value is not None and stand_pat + value * 100 + self.DELTA_MARGIN <= alpha:
+                break
+            
+            undo = board.make_move(piece, move)
+            score = -self._quiesce(board, colour ^ 1, -beta, -alpha)
+            board.unmake_move(undo)
+            if self.stopped:
+                return 0
             
-            return best_move, min_value
+            if score > best:
+                best = score
+            if score > alpha:
+                alpha = score
+                if alpha >= beta:
+                    break
+        
+        return best
+    
+    def _score(self, board, colour):
+        """Running material and piece-square score in centipawns for the side to move"""
+        return board.score if colour == WHITE else -board.score
+    
+    def _record_cutoff(self, board, piece, move, index, ply, depth):
+        """Count a beta cutoff and remember a quiet cutoff move as killer and in the history table"""
+        while len(self.cutoffs) <= index:
+            self.cutoffs.append(0)
+        self.cutoffs[index] += 1
+        
+        if board.mvv_lva(piece, move) is not None:
+            return
+        key = board.move_key(piece, move)
+        killers = self._killers[ply]
+        if key not in killers:
+            killers.insert(0, key)
+            del killers[self.KILLER_SLOTS:]
+        self._history[key] += depth * depth
+    
+    def _probe(self, key):
+        """Transposition table entry (key, depth, bound, score, best move key) or None"""
+        self.stats.tt_probes += 1
+        entry = self._transposition_table[key % self._table_size]
+        if entry is not None and entry[0] == key:
+            self.stats.tt_hits += 1
+            return entry
+        return None
+    
+    def _store(self, key, depth, score, alpha, beta, best_move):
+        """Store a search result, keeping the deeper entry for the same position"""
+        index = key % self._table_size
+        entry = self._transposition_table[index]
+        if entry is not None and entry[0] == key and entry[1] > depth:
+            return
+        
+        # The score only bounds the true value when it fell outside the window
+        if score <= alpha:
+            bound = self.UPPER_BOUND
+        elif score >= beta:
+            bound = self.LOWER_BOUND
+        else:
+            bound = self.EXACT
+        self._transposition_table[index] = (key, depth, bound, score, best_move)
     
-    def _order_moves(self, board, moves):
+    def _order_moves(self, board, moves, ply=None, hash_move=None):
         """
         Order moves to improve alpha-beta pruning efficiency
-        Captures first (sorted by MVV-LVA), then checks, then other moves
+        Hash move first, then captures (sorted by MVV-LVA), then the killer moves
+        of the ply, then other moves by history score
         """
+        hash_moves = []
         capture_moves = []
-        check_moves = []
+        killer_moves = []
         other_moves = []
+        killers = self._killers[ply] if ply is not None else ()
+        history = self._history
         
         for piece, move in moves:
-            # Check if move is a capture
-            if board.squares[move.final.row][move.final.col].has_piece():
-                # MVV-LVA: Most Valuable Victim - Least Valuable Attacker
-                captured_piece = board.squares[move.final.row][move.final.col].piece
-                capture_value = abs(captured_piece.value) - abs(piece.value)
+            key = board.move_key(piece, move)
+            # Best move of an earlier search of this position
+            if key == hash_move:
+                hash_moves.append((piece, move))
+                continue
+            # MVV-LVA: Most Valuable Victim - Least Valuable Attacker (None if not a capture)
+            capture_value = board.mvv_lva(piece, move)
+            if capture_value is not None:
                 capture_moves.append((capture_value, piece, move))
+            elif key in killers:
+                killer_moves.append((killers.index(key), piece, move))
             else:
-                # Check if move gives check (simplified check)
-                # This is a heuristic - we'll check if it's likely a check
-                other_moves.append((piece, move))
+                other_moves.append((history[key], piece, move))
         
         # Sort captures by value (highest first) - MVV-LVA ordering
         capture_moves.sort(key=lambda x: x[0], reverse=True)
+        # Most recent killer first, then quiet moves with the most cutoffs (ties keep generation order)
+        killer_moves.sort(key=lambda x: x[0])
+        other_moves.sort(key=lambda x: x[0], reverse=True)
         
-        # Combine: captures first, then checks, then other moves
-        ordered = [(p, m) for _, p, m in capture_moves] + check_moves + other_moves
+        # Combine: hash move, captures, killers, then other moves
+        ordered = hash_moves + [(p, m) for _, p, m in capture_moves] + \
+            [(p, m) for _, p, m in killer_moves] + [(p, m) for _, p, m in other_moves]
         return ordered
     
     def _get_all_moves(self, board, colour):
         """
-        Get all possible moves for a given colour
+        Get all legal moves for a given colour
         Returns list of (piece, move) tuples
         """
-        moves = []
-        for row in range(ROWS):
-            for col in range(COLS):
-                if board.squares[row][col].has_piece():
-                    piece = board.squares[row][col].piece
-                    if piece.colour == colour:
-                        piece.clear_moves()
-                        board.calc_moves(piece, row, col, bool=True)
-                        for move in piece.moves:
-                            moves.append((piece, move))
-        return moves
-    
-    def _find_move_in_piece(self, piece, final_row, final_col):
-        """Find move with matching final position"""
-        for move in piece.moves:
-            if move.final.row == final_row and move.final.col == final_col:
-                return move
-        return None
+        self.stats.move_generations += 1
+        return board.legal_moves(colour)
     
     def _find_king(self, board, colour):
-        """Find and cache king position"""
-        for row in range(ROWS):
-            for col in range(COLS):
-                if board.squares[row][col].has_piece():
-                    piece = board.squares[row][col].piece
-                    if isinstance(piece, King) and piece.colour == colour:
-                        return row, col
-        return None, None
+        """Find king position"""
+        return board.king_square(colour)
     
     def _is_in_check(self, board, colour):
-        """Check if the king of given colour is in check - optimized"""
-        # Find the king
-        king_row, king_col = self._find_king(board, colour)
-        
-        if king_row is None:
-            return False
-        
-        # Check if any enemy piece can attack the king
-        opponent_colour = "black" if colour == "white" else "white"
-        for row in range(ROWS):
-            for col in range(COLS):
-                if board.squares[row][col].has_piece():
-                    piece = board.squares[row][col].piece
-                    if piece.colour == opponent_colour:
-                        # Quick check for direct attacks (without full move calculation)
-                        if self._can_attack_square(board, piece, row, col, king_row, king_col):
-                            return True
-        
-        return False
-    
-    def _can_attack_square(self, board, piece, piece_row, piece_col, target_row, target_col):
-        """Quick check if piece can attack target square without full move calculation"""
-        # Only calculate moves if necessary
-        if not piece.moves:
-            piece.clear_moves()
-            board.calc_moves(piece, piece_row, piece_col, bool=False)
-        
-        for move in piece.moves:
-            if move.final.row == target_row and move.final.col == target_col:
-                return True
-        return False
-    
-    def _get_piece_square_value(self, piece, row, col):
-        """Get positional value from piece-square table"""
-        # Flip row for black pieces (black's perspective)
-        if piece.colour == "black":
-            row = 7 - row
-        
-        if isinstance(piece, Pawn):
-            return self.PAWN_TABLE[row][col]
-        elif isinstance(piece, Knight):
-            return self.KNIGHT_TABLE[row][col]
-        elif isinstance(piece, Bishop):
-            return self.BISHOP_TABLE[row][col]
-        elif isinstance(piece, Rook):
-            return self.ROOK_TABLE[row][col]
-        elif isinstance(piece, Queen):
-            return self.QUEEN_TABLE[row][col]
-        elif isinstance(piece, King):
-            return self.KING_TABLE_MIDDLE[row][col]
-        return 0
+        """Check if the king of given colour is attacked"""
+        self.stats.check_tests += 1
+        return board.king_in_check(colour)
     
     def _evaluate_pawn_structure(self, board, colour):
         """Evaluate pawn structure - simplified for speed"""
@@ -389,16 +812,13 @@ class Engine:
         pawns = []
         pawn_cols = {}  # Track pawns per column
         
-        # Collect pawn positions (single pass)
-        for row in range(ROWS):
-            for col in range(COLS):
-                if board.squares[row][col].has_piece():
-                    piece = board.squares[row][col].piece
-                    if isinstance(piece, Pawn) and piece.colour == colour:
-                        pawns.append((row, col))
-                        if col not in pawn_cols:
-                            pawn_cols[col] = []
-                        pawn_cols[col].append(row)
+        # Collect pawn positions (from the piece list)
+        for row, col in board.piece_squares(colour):
+            if board.squares[row][col].piece.kind == PAWN:
+                pawns.append((row, col))
+                if col not in pawn_cols:
+                    pawn_cols[col] = []
+                pawn_cols[col].append(row)
         
         # Doubled pawns penalty (simplified)
         for col, rows in pawn_cols.items():
@@ -418,7 +838,7 @@ class Engine:
         
         # Simplified passed pawns (only check immediate squares)
         for row, col in pawns:
-            opponent_dir = 1 if colour == "white" else -1
+            opponent_dir = 1 if colour == WHITE else -1
             next_row = row + opponent_dir
             if 0 <= next_row < 8:
                 # Check if opponent has pawns blocking
@@ -427,12 +847,12 @@ class Engine:
                     if 0 <= check_col < 8:
                         if board.squares[next_row][check_col].has_piece():
                             p = board.squares[next_row][check_col].piece
-                            if isinstance(p, Pawn) and p.colour != colour:
+                            if p.kind == PAWN and p.side != colour:
                                 blocked = True
                                 break
                 if not blocked:
                     # Bonus for advancing pawns
-                    advance_bonus = (7 - row) * 0.2 if colour == "white" else row * 0.2
+                    advance_bonus = (7 - row) * 0.2 if colour == WHITE else row * 0.2
                     score += advance_bonus
         
         return score
@@ -440,26 +860,23 @@ class Engine:
     def _evaluate_mobility(self, board, colour):
         """Evaluate piece mobility (number of legal moves) - optimized version"""
         mobility = 0
-        # Cache move counts to avoid recalculating
-        for row in range(ROWS):
-            for col in range(COLS):
-                if board.squares[row][col].has_piece():
-                    piece = board.squares[row][col].piece
-                    if piece.colour == colour:
-                        # Only calculate if moves haven't been calculated
-                        if not piece.moves:
-                            piece.clear_moves()
-                            board.calc_moves(piece, row, col, bool=True)
-                        move_count = len(piece.moves)
-                        # Different pieces have different mobility values
-                        if isinstance(piece, Pawn):
-                            mobility += move_count * 0.1
-                        elif isinstance(piece, Knight) or isinstance(piece, Bishop):
-                            mobility += move_count * 0.15
-                        elif isinstance(piece, Rook):
-                            mobility += move_count * 0.2
-                        elif isinstance(piece, Queen):
-                            mobility += move_count * 0.25
+        # Checkers and pins are shared by all pieces of the colour
+        info = board.check_info(colour)
+        for row, col in board.piece_squares(colour):
+            piece = board.squares[row][col].piece
+            # Cached moves may belong to another position of the search
+            piece.clear_moves()
+            board.calc_moves(piece, row, col, bool=True, info=info)
+            move_count = len(piece.moves)
+            # Different pieces have different mobility values
+            if piece.kind == PAWN:
+                mobility += move_count * 0.1
+            elif piece.kind == KNIGHT or piece.kind == BISHOP:
+                mobility += move_count * 0.15
+            elif piece.kind == ROOK:
+                mobility += move_count * 0.2
+            elif piece.kind == QUEEN:
+                mobility += move_count * 0.25
         return mobility
     
     def _evaluate_king_safety(self, board, colour):
@@ -483,21 +900,21 @@ class Engine:
                 if 0 <= check_row < 8 and 0 <= check_col < 8:
                     if board.squares[check_row][check_col].has_piece():
                         piece = board.squares[check_row][check_col].piece
-                        if piece.colour == colour:
+                        if piece.side == colour:
                             friendly_near_king += 0.1
         
         score += friendly_near_king
         
         # Penalty if king is exposed (no pawns in front)
-        if colour == "white":
+        if colour == WHITE:
             if king_row > 0:
                 if not board.squares[king_row - 1][king_col].has_piece() or \
-                   not isinstance(board.squares[king_row - 1][king_col].piece, Pawn):
+                   board.squares[king_row - 1][king_col].piece.kind != PAWN:
                     score -= 0.2
         else:
             if king_row < 7:
                 if not board.squares[king_row + 1][king_col].has_piece() or \
-                   not isinstance(board.squares[king_row + 1][king_col].piece, Pawn):
+                   board.squares[king_row + 1][king_col].piece.kind != PAWN:
                     score -= 0.2
         
         return score
@@ -506,35 +923,11 @@ class Engine:
         """
         Fast evaluation - only material and basic position
         """
-        score = 0
-        white_material = 0
-        black_material = 0
-        
-        # Material and basic positional evaluation
-        for row in range(ROWS):
-            for col in range(COLS):
-                if board.squares[row][col].has_piece():
-                    piece = board.squares[row][col].piece
-                    
-                    # Material value
-                    if piece.colour == "white":
-                        white_material += abs(piece.value)
-                    else:
-                        black_material += abs(piece.value)
-                    
-                    # Basic positional value
-                    pos_value = self._get_piece_square_value(piece, row, col)
-                    if piece.colour == "white":
-                        score += pos_value
-                    else:
-                        score -= pos_value
-        
-        # Material difference
-        material_diff = white_material - black_material
-        score += material_diff
+        # Material and basic positional evaluation, positive favours white
+        score = board.material_score()
         
         # Return score from the perspective of the given colour
-        if colour == "white":
+        if colour == WHITE:
             return score
         else:
             return -score
@@ -544,59 +937,70 @@ class Engine:
         Comprehensive evaluation function
         Positive values favor white, negative favor black
         """
-        score = 0
-        
-        # Material evaluation
-        white_material = 0
-        black_material = 0
-        
-        # Positional and material evaluation
-        for row in range(ROWS):
-            for col in range(COLS):
-                if board.squares[row][col].has_piece():
-                    piece = board.squares[row][col].piece
-                    
-                    # Material value
-                    if piece.colour == "white":
-                        white_material += abs(piece.value)
-                    else:
-                        black_material += abs(piece.value)
-                    
-                    # Positional value from piece-square tables
-                    pos_value = self._get_piece_square_value(piece, row, col)
-                    if piece.colour == "white":
-                        score += pos_value
-                    else:
-                        score -= pos_value
-        
-        # Material difference
-        material_diff = white_material - black_material
-        score += material_diff
+        # Material and positional evaluation from piece-square tables
+        score = board.material_score()
         
         # Only evaluate expensive features at root or when needed
         # Pawn structure evaluation (expensive, so we'll make it optional)
-        white_pawn_structure = self._evaluate_pawn_structure(board, "white")
-        black_pawn_structure = self._evaluate_pawn_structure(board, "black")
+        white_pawn_structure = self._evaluate_pawn_structure(board, WHITE)
+        black_pawn_structure = self._evaluate_pawn_structure(board, BLACK)
         score += white_pawn_structure - black_pawn_structure
         
-        # Mobility evaluation (expensive)
-        white_mobility = self._evaluate_mobility(board, "white")
-        black_mobility = self._evaluate_mobility(board, "black")
-        score += white_mobility - black_mobility
-        
         # King safety
-        white_king_safety = self._evaluate_king_safety(board, "white")
-        black_king_safety = self._evaluate_king_safety(board, "black")
+        white_king_safety = self._evaluate_king_safety(board, WHITE)
+        black_king_safety = self._evaluate_king_safety(board, BLACK)
         score += white_king_safety - black_king_safety
         
-        # Check bonus/penalty
-        if self._is_in_check(board, "black"):
-            score += 0.5  # White has opponent in check
-        if self._is_in_check(board, "white"):
-            score -= 0.5  # Black has opponent in check
+        # Mobility and checks (expensive, need move generation)
+        score += self._evaluate_activity(board)
         
         # Return score from the perspective of the given colour
-        if colour == "white":
+        if colour == WHITE:
             return score
         else:
             return -score
+    
+    def _evaluate_activity(self, board):
+        """Mobility and check terms of evaluate, positive favours white"""
+        # Mobility evaluation (expensive)
+        white_mobility = self._evaluate_mobility(board, WHITE)
+        black_mobility = self._evaluate_mobility(board, BLACK)
+        score = white_mobility - black_mobility
+        
+        # Check bonus/penalty
+        if self._is_in_check(board, BLACK):
+            score += 0.5  # White has opponent in check
+        if self._is_in_check(board, WHITE):
+            score -= 0.5  # Black has opponent in check
+        return score
+    
+    def evaluate_batch(self, boards, colour=WHITE):
+        """
+        Evaluate many boards at once, same values as evaluate (needs numpy)
+        Material, piece-square, pawn structure and king safety terms are computed
+        with array operations over the whole batch (see batch.py), mobility and
+        checks still need move generation per board
+        Returns a float64 array with one score per board from the perspective of colour
+        """
+        scores = batch.static_scores(batch.encode_planes(boards))
+        for i, board in enumerate(boards):
+            scores[i] += self._evaluate_activity(board)
+        
+        # Return scores from the perspective of the given colour
+        if colour == WHITE:
+            return scores
+        else:
+            return -scores
+
+
+# Engine of a worker process of the parallel search
+_worker_engine = None
+
+
+def _start_worker(options):
+    global _worker_engine
+    _worker_engine = Engine(**options)
+
+
+def _search_worker_move(position, colour, squares, depth, alpha, beta, deadline):
+    return _worker_engine._search_worker(position, colour, squares, depth, alpha, beta, deadline)
@@ -5,6 +5,7 @@ from constants import *
 from board import Board
 from dragger import Dragger
 from engine import Engine
+from piece import WHITE, COLOUR_INDEX
 
 class Game:
     # Class-level image cache for piece textures
@@ -12,6 +13,8 @@ class Game:
 
     def __init__(self, start_pieces, eval_bar=False, timer_minutes=0, player_colour=None):
         self.next_player = "white"
+        # Full move number, increases after black's move
+        self.move_number = 1
         self.start_pieces = start_pieces
         self.board = Board(start_pieces)
         self.dragger = Dragger()
@@ -47,6 +50,11 @@ class Game:
             )
         return cls._image_cache[cache_key]
 
+    @staticmethod
+    def texture(piece):
+        """Image path of a piece (textures are kept out of the pieces the engine works with)"""
+        return os.path.join("images", f"{piece.colour}_{piece.name}.png")
+
 
     # blit methods
 
@@ -71,10 +79,10 @@ class Game:
                     piece = self.board.squares[row][col].piece
                     # all pieces except dragger piece
                     if piece is not self.dragger.piece:
-                        img = self.get_cached_image(piece.texture, SQUARE_SIZE)
+                        img = self.get_cached_image(self.texture(piece), SQUARE_SIZE)
                         img_center = col * SQUARE_SIZE + SQUARE_SIZE // 2, row * SQUARE_SIZE + SQUARE_SIZE // 2
-                        piece.texture_rect = img.get_rect(center=img_center)
-                        surface.blit(img, piece.texture_rect)
+                        texture_rect = img.get_rect(center=img_center)
+                        surface.blit(img, texture_rect)
 
     def show_moves(self, surface):
 
@@ -182,7 +190,7 @@ class Game:
         # Get current position evaluation
         engine = self._get_engine()
         # Evaluate from white's perspective
-        evaluation = engine._fast_evaluate(self.board, "white")
+        evaluation = engine._fast_evaluate(self.board, WHITE)
         
         # Normalize evaluation to -1.0 to 1.0 range (clamp to reasonable values)
         # Typical chess evaluation range: -20 to +20 (pawn units)
@@ -247,6 +255,8 @@ class Game:
             # Stop timer - it will restart when show_timer is called for the new player
             self.last_time_update = None
         
+        if self.next_player == "black":
+            self.move_number += 1
         self.next_player = "white" if self.next_player == "black" else "black"
         
         # Timer will restart when show_timer is called for the new player
@@ -300,6 +310,12 @@ class Game:
             return True  # Time expired
         return False
     
+    def spend_time(self, colour, seconds):
+        """Take thinking time off a player's clock (the computer's clock is not run by show_timer)"""
+        if not self.timer_enabled:
+            return
+        self.time_remaining[colour] = max(0, self.time_remaining[colour] - seconds)
+    
     def get_time_remaining(self, colour):
         """Get time remaining for a player in seconds"""
         return max(0, self.time_remaining[colour])
@@ -347,21 +363,25 @@ class Game:
         
         return time_expired
 
+    def show_thinking(self, surface):
+        """Show that the computer is thinking, in the bottom right where the player's timer goes"""
+        try:
+            font = pygame.font.Font("font.ttf", 16)
+        except:
+            font = pygame.font.Font(None, 16)
+        
+        # Dots cycle so the window visibly stays alive during a long search
+        dots = "." * (int(time.time() * 2) % 4)
+        thinking_text = font.render("THINKING" + dots, True, pygame.Color("black"))
+        thinking_rect = thinking_text.get_rect()
+        # Below the board on the right (screen is 500x500, board is 400x400), left aligned so the dots do not shift it
+        thinking_rect.bottomleft = (WIDTH, 500 - 10)
+        surface.blit(thinking_text, thinking_rect)
+
 
     def checkmate(self):
-        m = 0
-        for row in range(ROWS):
-            for col in range(COLS):
-                if self.board.squares[row][col].has_team_piece(self.next_player):
-                    p = self.board.squares[row][col].piece
-                    p.clear_moves()
-                    self.board.calc_moves(p, row, col, bool=True)
-                    if len(p.moves) > 0:
-                        m = m + 1
-        if m == 0:
-            return True
-        
-        return False
+        # no legal move for the side to move (walks the piece list, not the 64 squares)
+        return not self.board.legal_moves(COLOUR_INDEX[self.next_player])
 
 
     def reset(self):
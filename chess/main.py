@@ -1,5 +1,7 @@
 import pygame
+import os
 import sys
+import time
 
 from constants import *
 from game import Game
@@ -7,6 +9,9 @@ from square import Square
 from move import Move
 from button import Button
 from engine import Engine
+from book import OpeningBook
+from tablebase import Tablebases
+from piece import COLOUR_INDEX
 
 class Main:
 
@@ -18,6 +23,8 @@ class Main:
         self.eval_bar = False
         self.winner = ""
         self.g_mode = ""
+        # Computer mode: the engine thinks on the player's time about the reply it expects
+        self.ponder = True
         # Cache fonts and images
         self._cache_resources()
     
@@ -356,9 +363,16 @@ class Main:
                 
                 pygame.display.update()
         elif self.g_mode == "computer":
-            # Initialize engine with depth 2
-            engine = Engine(depth=2)
+            # Initialize engine with depth 2 (used without a clock), searching on bitboards,
+            # playing the opening from the book when there is one (see book.py)
+            # and playing the endgames of the tablebases (see tablebase.py) perfectly
+            book = OpeningBook("book.bin") if os.path.exists("book.bin") else None
+            engine = Engine(depth=2, backend="bitboard", book=book, tablebases=Tablebases())
             computer_moved = False
+            # Future of the computer's move while the engine thinks in the background
+            search = None
+            # Future of the search on the player's time (pondering), None when not pondering
+            pondering = None
             # Pass player colour so timer only runs for human player
             game.player_colour = start_pieces
 
@@ -366,11 +380,38 @@ class Main:
                 # Computer's turn - use engine to find best move
                 if game.next_player != start_pieces and not computer_moved:
                     computer_colour = "black" if start_pieces == "white" else "white"
-                    best_move = engine.search(board, computer_colour)
+                    best_move = None
+                    if search is None:
+                        # Think in the background so the window keeps drawing and handling events
+                        time_limit = None
+                        if game.timer_enabled:
+                            # Think for a share of the computer's clock, deepening until the time is used
+                            time_limit = engine.time_for_move(game.get_time_remaining(computer_colour), game.move_number)
+                        search_start = time.time()
+                        if pondering is not None:
+                            last = board.last_move
+                            if engine.ponder_move == (last.initial.row, last.initial.col, last.final.row, last.final.col):
+                                # Ponder hit: the search of this position is already running, give it the clock
+                                engine.ponder_hit(time_limit=time_limit)
+                                search = pondering
+                            else:
+                                # Ponder miss: drop the speculative search (its table entries do no harm)
+                                engine.stop(pondering)
+                            pondering = None
+                        if search is None:
+                            search = engine.search_async(board, COLOUR_INDEX[computer_colour], time_limit=time_limit)
+                    elif search.done():
+                        best_move = search.result()
+                        search = None
+                        game.spend_time(computer_colour, time.time() - search_start)
+                        if game.timer_enabled and game.get_time_remaining(computer_colour) == 0:
+                            self.winner = "PLAYER"
+                            self.end_screen()
+                            return
                     
                     if best_move:
                         piece, move = best_move
-                        # Find the actual piece on the board
+                        # Find the actual piece on the board (the engine searched a copy of it)
                         actual_piece = board.squares[move.initial.row][move.initial.col].piece
                         if actual_piece:
                             # Recalculate moves for the piece
@@ -397,6 +438,9 @@ class Main:
                                     self.winner = "COMPUTER"
                                     self.end_screen()
                                     return
+                                if self.ponder:
+                                    # Think about the expected reply while the player thinks
+                                    pondering = engine.ponder(board, COLOUR_INDEX[start_pieces])
                 
                 # show methods
                 screen.fill("white")
@@ -412,9 +456,13 @@ class Main:
                     # Time ran out - opponent wins
                     expired_player = game.next_player
                     self.winner = "WHITE" if expired_player == "white" else "BLACK"
+                    engine.stop(pondering)
                     self.end_screen()
                     break
 
+                if search is not None:
+                    game.show_thinking(screen)
+
                 if dragger.dragging:
                     dragger.update_blit(screen)
 
@@ -474,13 +522,15 @@ class Main:
                                 computer_moved = False  # Reset flag for computer's next move
                                 if game.checkmate():
                                     self.winner = "PLAYER"
+                                    engine.stop(pondering)
                                     self.end_screen()
                                     return
 
                         dragger.undrag_piece()
 
-                    # quit application
+                    # quit application (ending the search, its thread would keep the process alive)
                     if event.type == pygame.QUIT:
+                        engine.stop(pondering)
                         pygame.quit()
                         sys.exit()
                     
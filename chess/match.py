@@ -0,0 +1,269 @@
+"""
+Engine-vs-engine matches: two Engine configurations play each other from a suite
+of opening positions (each position twice, colours swapped), many games at a
+time in worker processes. Mates, draws (fifty moves, repetition, insufficient
+material, tablebases, move limit) and lost positions are adjudicated, and a
+sequential probability ratio test ends the match as soon as it is clear whether
+the first engine is stronger.
+
+    python match.py --first depth=3 --second depth=3 null_move=False --games 2000 --workers 8
+    python match.py --first depth=3 --second depth=2 --movetime 0.1 --output summary.json
+
+Engine options are Engine keyword arguments; tablebases=True and book=True load
+the shipped tables and book.
+"""
+import argparse
+import ast
+import json
+import math
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from board import Board
+from engine import Engine
+from book import OpeningBook
+from tablebase import Tablebases
+from pgn import read_games, replay
+from piece import *
+
+DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+OPENINGS = os.path.join(DIRECTORY, "openings.pgn")
+
+# A side resigns after this many moves in a row with a search score this bad
+RESIGN_SCORE = 1000
+RESIGN_MOVES = 4
+
+# Games still going after this many plies are drawn
+MAX_PLIES = 300
+
+# Tablebases of the worker process, used to adjudicate positions with few pieces
+_tablebases = None
+
+
+def opening_positions(path=OPENINGS):
+    """FEN of the position at the end of every game of a PGN file, or of every line of a FEN file"""
+    if not path.endswith(".pgn"):
+        with open(path) as f:
+            return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    fens = []
+    for game in read_games(path):
+        board = None
+        for board, colour, piece, move in replay(game):
+            pass
+        if board is not None:
+            # the board is left after the last move
+            fens.append(board.to_fen(colour ^ 1))
+    return fens
+
+
+def _engine(options):
+    options = dict(options)
+    if options.pop("tablebases", False):
+        options["tablebases"] = Tablebases()
+    if options.pop("book", False):
+        options["book"] = OpeningBook(os.path.join(DIRECTORY, "book.bin"))
+    return Engine(**options)
+
+
+def _start_worker():
+    global _tablebases
+    _tablebases = Tablebases()
+
+
+def _insufficient_material(board):
+    # bare kings, or a single knight or bishop left
+    pieces = [kind for side, kind, sq in board.piece_list() if kind != KING]
+    return not pieces or (len(pieces) == 1 and pieces[0] in (KNIGHT, BISHOP))
+
+
+def play_game(white_options, black_options, fen, movetime=None, max_plies=MAX_PLIES):
+    """
+    Play one game from a FEN position, returns (white's score 1/0.5/0, reason, plies)
+    A move takes movetime seconds, or the fixed depth of the engine options when movetime is None
+    """
+    board, colour = Board.from_fen(fen)
+    engines = [_engine(white_options), _engine(black_options)]
+    # search score of the last move of each side, from its own point of view
+    scores = [None, None]
+    for side, engine in enumerate(engines):
+        engine.info = lambda depth, score, side=side: scores.__setitem__(side, score)
+    losing = [0, 0]
+    seen = {}
+    plies = 0
+    try:
+        while True:
+            if not board.legal_moves(colour):
+                if board.king_in_check(colour):
+                    return float(colour == BLACK), "checkmate", plies
+                return 0.5, "stalemate", plies
+            if board.halfmove_clock >= 100:
+                return 0.5, "fifty moves", plies
+            seen[board.zobrist] = seen.get(board.zobrist, 0) + 1
+            if seen[board.zobrist] >= 3:
+                return 0.5, "repetition", plies
+            if _insufficient_material(board):
+                return 0.5, "insufficient material", plies
+            if _tablebases is not None and board.piece_count() <= _tablebases.MAX_PIECES:
+                result = _tablebases.probe(board, colour)
+                if result is not None:
+                    outcome = result[0] if colour == WHITE else -result[0]
+                    return (outcome + 1) / 2, "tablebases", plies
+            if plies >= max_plies:
+                return 0.5, "move limit", plies
+
+            scores[colour] = None
+            piece, move = engines[colour].search(board, colour, time_limit=movetime)
+            if scores[colour] is not None and scores[colour] <= -RESIGN_SCORE:
+                losing[colour] += 1
+                if losing[colour] >= RESIGN_MOVES:
+                    return float(colour == BLACK), "resignation", plies
+            else:
+                losing[colour] = 0
+            board.make_move(piece, move)
+            colour ^= 1
+            plies += 1
+    finally:
+        for engine in engines:
+            engine.close()
+
+
+def _play(first, second, fen, first_white, movetime, max_plies):
+    # game of the match, scored for the first engine
+    if first_white:
+        return play_game(first, second, fen, movetime, max_plies)
+    score, reason, plies = play_game(second, first, fen, movetime, max_plies)
+    return 1 - score, reason, plies
+
+
+def elo(score):
+    """Elo difference of a score (0 < score < 1)"""
+    score = min(max(score, 1e-6), 1 - 1e-6)
+    return -400 * math.log10(1 / score - 1)
+
+
+def _score_stats(wins, draws, losses):
+    # mean score per game and its variance, with half a win and half a loss added to the
+    # variance so that it is not 0 when every game has the same result
+    games = wins + draws + losses
+    score = (wins + draws / 2) / games
+    variance = ((wins + 0.5) * (1 - score) ** 2 + draws * (0.5 - score) ** 2 + (losses + 0.5) * score ** 2) / \
+        (games + 1)
+    return score, variance
+
+
+def sprt_llr(wins, draws, losses, elo0, elo1):
+    """Log likelihood ratio of H1 (elo1) against H0 (elo0), normal approximation of the score"""
+    games = wins + draws + losses
+    if not games:
+        return 0.0
+    score, variance = _score_stats(wins, draws, losses)
+    s0 = 1 / (1 + 10 ** (-elo0 / 400))
+    s1 = 1 / (1 + 10 ** (-elo1 / 400))
+    return games * (s1 - s0) * (2 * score - s0 - s1) / (2 * variance)
+
+
+def summary(wins, draws, losses, llr=None, bounds=None):
+    """Results of a match for the first engine, Elo with a 95% interval"""
+    games = wins + draws + losses
+    result = {"games": games, "wins": wins, "draws": draws, "losses": losses}
+    if not games:
+        return result
+    score, variance = _score_stats(wins, draws, losses)
+    margin = 1.96 * math.sqrt(variance / games)
+    result["score"] = round(score, 4)
+    result["elo"] = round(elo(score), 1)
+    result["elo_error"] = round((elo(score + margin) - elo(score - margin)) / 2, 1)
+    if llr is not None:
+        result["llr"] = round(llr, 3)
+        result["llr_bounds"] = [round(bound, 3) for bound in bounds]
+        result["sprt"] = "H1" if llr >= bounds[1] else "H0" if llr <= bounds[0] else None
+    return result
+
+
+def run_match(first, second, openings, games, workers=1, movetime=None, max_plies=MAX_PLIES,
+              elo0=0, elo1=5, alpha=0.05, beta=0.05, log=print):
+    """
+    Play up to games games between two engine option dicts, stopping once the SPRT
+    accepts H0 (the first engine is not elo1 stronger) or H1 (it is not elo0 weaker or worse)
+    The summary counts the games finished when the SPRT decided
+    """
+    bounds = (math.log(beta / (1 - alpha)), math.log((1 - beta) / alpha))
+    wins = draws = losses = 0
+    llr = 0.0
+    reasons = {}
+    started = 0
+    pending = set()
+    with ProcessPoolExecutor(workers, initializer=_start_worker) as pool:
+        while True:
+            # keep every worker busy, a few games ahead
+            while started < games and len(pending) < 2 * workers:
+                fen = openings[started // 2 % len(openings)]
+                pending.add(pool.submit(_play, first, second, fen, started % 2 == 0, movetime, max_plies))
+                started += 1
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                score, reason, plies = future.result()
+                wins += score == 1
+                draws += score == 0.5
+                losses += score == 0
+                reasons[reason] = reasons.get(reason, 0) + 1
+            llr = sprt_llr(wins, draws, losses, elo0, elo1)
+            if log is not None:
+                log(f"{wins + draws + losses} games  +{wins} ={draws} -{losses}  LLR {llr:.2f} "
+                    f"[{bounds[0]:.2f}, {bounds[1]:.2f}]")
+            if not bounds[0] < llr < bounds[1]:
+                # decided: games not started yet are dropped, those still being played are not counted
+                pool.shutdown(wait=False, cancel_futures=True)
+                break
+    result = summary(wins, draws, losses, llr, bounds)
+    result["reasons"] = reasons
+    return result
+
+
+def _options(words):
+    """Engine keyword arguments from key=value words"""
+    options = {}
+    for word in words:
+        key, _, value = word.partition("=")
+        try:
+            options[key] = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            options[key] = value
+    return options
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play two engine configurations against each other")
+    parser.add_argument("--first", nargs="*", default=[], help="options of the engine under test (key=value)")
+    parser.add_argument("--second", nargs="*", default=[], help="options of the reference engine (key=value)")
+    parser.add_argument("--openings", default=OPENINGS, help="PGN (positions after each game) or FEN file")
+    parser.add_argument("--games", type=int, default=1000, help="most games to play (default: 1000)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="games played at once")
+    parser.add_argument("--movetime", type=float, help="seconds per move (default: the engines' fixed depth)")
+    parser.add_argument("--max-plies", type=int, default=MAX_PLIES, help="plies after which a game is drawn")
+    parser.add_argument("--elo0", type=float, default=0, help="SPRT H0 Elo difference (default: 0)")
+    parser.add_argument("--elo1", type=float, default=5, help="SPRT H1 Elo difference (default: 5)")
+    parser.add_argument("--alpha", type=float, default=0.05)
+    parser.add_argument("--beta", type=float, default=0.05)
+    parser.add_argument("--output", help="write the summary as JSON to this file")
+    args = parser.parse_args(argv)
+
+    result = run_match(_options(args.first), _options(args.second), opening_positions(args.openings),
+                       args.games, args.workers, args.movetime, args.max_plies,
+                       args.elo0, args.elo1, args.alpha, args.beta)
+    if "elo" in result:
+        print(f"Elo {result['elo']:+.1f} +/- {result['elo_error']:.1f}, "
+              f"SPRT {'H1 accepted' if result['sprt'] == 'H1' else 'H0 accepted' if result['sprt'] == 'H0' else 'inconclusive'}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+    else:
+        print(json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,8 @@
 
 class Move:
 
+    __slots__ = ("initial", "final")
+
     def __init__(self, initial, final):
         # initial and final are squares
         self.initial = initial
@@ -13,4 +15,4 @@ class Move:
         return s
 
     def __eq__(self, other):
-        return self.initial == other.initial and self.final == other.final
\ No newline at end of file
+        return self.initial == other.initial and self.final == other.final
@@ -0,0 +1,169 @@
+"""
+Headless perft and benchmark tool for move generation and search.
+
+    python perft.py                                   # check every reference position
+    python perft.py --position kiwipete --depth 3 --divide
+    python perft.py --bench                           # nodes per second
+    python perft.py --speedup --workers 1 2 4 8       # parallel search speedup
+"""
+import argparse
+import sys
+import time
+
+from board import Board
+from bitboard import BitBoard
+from engine import Engine
+from piece import *
+
+# Reference positions with their known node counts per depth. The board always
+# promotes to a queen, so the counts stop before the first underpromotion
+# shows up (which is also why "position 5" is missing).
+POSITIONS = {
+    "start": ("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+              [20, 400, 8902, 197281, 4865609]),
+    "kiwipete": ("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+                 [48, 2039, 97862]),
+    "position3": ("8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+                  [14, 191, 2812, 43238, 674624]),
+    "position4": ("r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+                  [6]),
+    "position6": ("r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+                  [46, 2079, 89890, 3894594]),
+}
+
+def perft(position, colour, depth):
+    """Number of leaf nodes of the legal move tree (bulk-counted at depth 1)"""
+    moves = position.legal_moves(colour)
+    if depth <= 1:
+        return len(moves) if depth == 1 else 1
+    opponent = colour ^ 1
+    nodes = 0
+    for piece, move in moves:
+        undo = position.make_move(piece, move)
+        nodes += perft(position, opponent, depth - 1)
+        position.unmake_move(undo)
+    return nodes
+
+
+def divide(board, position, colour, depth):
+    """Node count below each root move, as (move name, nodes) pairs"""
+    opponent = colour ^ 1
+    counts = []
+    for piece, move in position.legal_moves(colour):
+        initial_row, initial_col, final_row, final_col = position.move_squares(move)
+        name = board.square_name(initial_row, initial_col) + board.square_name(final_row, final_col)
+        undo = position.make_move(piece, move)
+        counts.append((name, perft(position, opponent, depth - 1)))
+        position.unmake_move(undo)
+    return sorted(counts)
+
+
+def _position(board, backend):
+    return BitBoard(board) if backend == "bitboard" else board
+
+
+def verify(names, depth, backends, orientations, show_divide=False):
+    """Compare perft counts with the reference numbers, returns True if all match"""
+    ok = True
+    for name in names:
+        fen, counts = POSITIONS[name]
+        for start_pieces in orientations:
+            for backend in backends:
+                for d in range(1, min(depth, len(counts)) + 1):
+                    board, colour = Board.from_fen(fen, start_pieces)
+                    position = _position(board, backend)
+                    start = time.perf_counter()
+                    if show_divide and d == min(depth, len(counts)):
+                        split = divide(board, position, colour, d)
+                        for move_name, nodes in split:
+                            print(f"    {move_name}: {nodes}")
+                        nodes = sum(nodes for _, nodes in split)
+                    else:
+                        nodes = perft(position, colour, d)
+                    elapsed = time.perf_counter() - start
+                    status = "ok" if nodes == counts[d - 1] else f"FAIL (expected {counts[d - 1]})"
+                    ok = ok and nodes == counts[d - 1]
+                    print(f"{name:<10} {start_pieces:<5} {backend:<8} depth {d}  {nodes:>9}  {elapsed:7.2f}s  {status}")
+    return ok
+
+
+def bench(names, depth, search_depth, backends):
+    """Report move generation and search speed in nodes per second"""
+    for name in names:
+        fen, counts = POSITIONS[name]
+        for backend in backends:
+            board, colour = Board.from_fen(fen)
+            d = min(depth, len(counts))
+            start = time.perf_counter()
+            nodes = perft(_position(board, backend), colour, d)
+            elapsed = time.perf_counter() - start
+            print(f"{name:<10} {backend:<8} perft({d})  {nodes:>9} nodes  {nodes / elapsed:>9.0f} nps")
+
+            engine = Engine(depth=search_depth, backend=backend)
+            start = time.perf_counter()
+            engine.search(board, colour)
+            elapsed = time.perf_counter() - start
+            print(f"{name:<10} {backend:<8} search({search_depth}) {engine.nodes:>9} nodes  {engine.nodes / elapsed:>9.0f} nps  {elapsed:.2f}s"
+                  f"  first-move cutoffs {engine.first_move_cutoff_rate():.0%}")
+
+
+def speedup(names, search_depth, worker_counts, backend):
+    """Time a fixed depth search per number of worker processes, against the serial best move"""
+    for name in names:
+        fen, counts = POSITIONS[name]
+        serial_time = None
+        serial_move = None
+        for workers in worker_counts:
+            board, colour = Board.from_fen(fen)
+            engine = Engine(depth=search_depth, backend=backend, workers=workers)
+            if workers > 1:
+                # start the worker processes before the clock runs
+                list(engine._executor().map(abs, range(workers)))
+            start = time.perf_counter()
+            piece, move = engine.search(board, colour)
+            elapsed = time.perf_counter() - start
+            engine.close()
+
+            initial_row, initial_col, final_row, final_col = board.move_squares(move)
+            best = board.square_name(initial_row, initial_col) + board.square_name(final_row, final_col)
+            if serial_time is None:
+                serial_time, serial_move = elapsed, best
+            status = "same move" if best == serial_move else f"DIFFERS from {serial_move}"
+            print(f"{name:<10} {backend:<8} search({search_depth}) {workers:>2} workers  {elapsed:7.2f}s"
+                  f"  speedup {serial_time / elapsed:5.2f}x  {engine.nodes:>9} nodes  {best}  {status}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Perft verification and move generation benchmarks")
+    parser.add_argument("--position", choices=sorted(POSITIONS), action="append",
+                        help="reference position (repeatable, default: all)")
+    parser.add_argument("--depth", type=int, default=3, help="maximum perft depth (default: 3)")
+    parser.add_argument("--divide", action="store_true", help="print node counts per root move")
+    parser.add_argument("--backend", choices=["board", "bitboard", "both"], default="both")
+    parser.add_argument("--start-pieces", choices=["white", "black", "both"], default="both",
+                        help="board orientation to test (default: both)")
+    parser.add_argument("--bench", action="store_true", help="report nodes per second instead of verifying")
+    parser.add_argument("--search-depth", type=int, default=3,
+                        help="Engine.search depth for --bench and --speedup (default: 3)")
+    parser.add_argument("--speedup", action="store_true",
+                        help="report the parallel search speedup instead of verifying")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8],
+                        help="worker process counts for --speedup, the first is the baseline (default: 1 2 4 8)")
+    args = parser.parse_args(argv)
+
+    names = args.position or list(POSITIONS)
+    backends = ["board", "bitboard"] if args.backend == "both" else [args.backend]
+    orientations = ["white", "black"] if args.start_pieces == "both" else [args.start_pieces]
+
+    if args.bench:
+        bench(names, args.depth, args.search_depth, backends)
+        return 0
+    if args.speedup:
+        for backend in backends:
+            speedup(names, args.search_depth, args.workers, backend)
+        return 0
+    return 0 if verify(names, args.depth, backends, orientations, args.divide) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,194 @@
+"""
+Streaming PGN reader: games are parsed one at a time from a file or stdin and
+their moves are replayed lazily, so archives of any size go through in
+bounded memory.
+
+    for game in read_games("games.pgn"):               # PgnGame: tags, SAN moves, result
+        for board, colour, piece, move in replay(game):
+            ...                                        # position before each move
+
+    python pgn.py games.pgn                  # count games and positions
+    python pgn.py games.pgn --fen            # FEN of every position, one per line
+    cat games.pgn | python pgn.py - --fen
+"""
+import argparse
+import re
+import sys
+
+from board import Board
+from piece import *
+
+RESULTS = ("1-0", "0-1", "1/2-1/2", "*")
+
+TAG = re.compile(r'\[\s*(\w+)\s+"((?:[^"\\]|\\.)*)"\s*\]')
+TOKEN = re.compile(r"[{}();]|\$\d+|[^\s{}();]+")
+MOVE_NUMBER = re.compile(r"^\d+\.*")
+
+SAN = re.compile(r"^([NBRQK])?([a-h])?([1-8])?x?([a-h][1-8])(?:=?([NBRQ]))?$")
+SAN_PIECES = {"N": KNIGHT, "B": BISHOP, "R": ROOK, "Q": QUEEN, "K": KING}
+
+
+class PgnGame:
+
+    __slots__ = ("tags", "moves", "result", "error")
+
+    def __init__(self, tags, moves, result):
+        self.tags = tags
+        # main line in SAN, comments and variations left out
+        self.moves = moves
+        self.result = result
+        # why replay stopped early, None if every move was played
+        self.error = None
+
+
+def read_games(source):
+    """
+    Generator of the games (PgnGame) of a PGN file: a path, "-" for stdin, or an open text file
+    Only the game being read is kept in memory
+    """
+    if source == "-":
+        yield from _parse(sys.stdin)
+    elif isinstance(source, str):
+        with open(source, encoding="utf-8", errors="replace") as f:
+            yield from _parse(f)
+    else:
+        yield from _parse(source)
+
+
+def _parse(lines):
+    tags = {}
+    moves = []
+    comment = False
+    depth = 0
+    for line in lines:
+        stripped = line.strip()
+        if not comment and not depth:
+            if stripped.startswith("%"):
+                # escaped line
+                continue
+            if stripped.startswith("["):
+                # tag pair, a new game when moves were read since the last one
+                if moves:
+                    yield PgnGame(tags, moves, tags.get("Result", "*"))
+                    tags, moves = {}, []
+                tag = TAG.match(stripped)
+                if tag:
+                    tags[tag.group(1)] = tag.group(2).replace('\\"', '"').replace("\\\\", "\\")
+                continue
+
+        for token in TOKEN.findall(line):
+            if comment:
+                comment = token != "}"
+            elif token == "{":
+                comment = True
+            elif token == ";":
+                # comment to the end of the line
+                break
+            elif token == "(":
+                depth += 1
+            elif token == ")":
+                depth = max(0, depth - 1)
+            elif depth or token.startswith("$"):
+                continue
+            elif token in RESULTS:
+                yield PgnGame(tags, moves, token)
+                tags, moves = {}, []
+            else:
+                token = MOVE_NUMBER.sub("", token)
+                if token:
+                    moves.append(token)
+    if moves or tags:
+        yield PgnGame(tags, moves, tags.get("Result", "*"))
+
+
+def resolve_san(board, colour, san):
+    """The legal (piece, move) a SAN move ("Nf3", "exd5", "O-O", "e8=Q+") stands for"""
+    san = san.rstrip("+#!?")
+    legal = board.legal_moves(colour)
+    if san in ("O-O", "0-0", "O-O-O", "0-0-0"):
+        file = "g" if san.count("-") == 1 else "c"
+        for piece, move in legal:
+            if piece.kind == KING and abs(move.final.col - move.initial.col) == 2 and \
+                    board.square_name(move.final.row, move.final.col)[0] == file:
+                return piece, move
+        raise ValueError(f"illegal castling {san}")
+
+    match = SAN.match(san)
+    if match is None:
+        raise ValueError(f"not a SAN move: {san}")
+    kind, from_file, from_rank, target, promotion = match.groups()
+    kind = SAN_PIECES[kind] if kind else PAWN
+    if promotion not in (None, "Q"):
+        # the board always promotes to a queen
+        raise ValueError(f"underpromotion is not supported: {san}")
+
+    found = None
+    for piece, move in legal:
+        if piece.kind != kind or board.square_name(move.final.row, move.final.col) != target:
+            continue
+        name = board.square_name(move.initial.row, move.initial.col)
+        if (from_file and name[0] != from_file) or (from_rank and name[1] != from_rank):
+            continue
+        if found is not None:
+            raise ValueError(f"ambiguous move {san}")
+        found = piece, move
+    if found is None:
+        raise ValueError(f"illegal move {san}")
+    return found
+
+
+def replay(game, start_pieces="white"):
+    """
+    Generator of (board, colour, piece, move) for every move of a game, the board standing
+    before the move. The same board is updated as the game goes on, copy it (or take its
+    FEN) to keep a position. An illegal move or a bad FEN tag ends the game early with
+    game.error set
+    """
+    if "FEN" in game.tags:
+        try:
+            board, colour = Board.from_fen(game.tags["FEN"], start_pieces)
+        except ValueError as error:
+            game.error = str(error)
+            return
+    else:
+        board, colour = Board(start_pieces), WHITE
+    for san in game.moves:
+        try:
+            piece, move = resolve_san(board, colour, san)
+        except ValueError as error:
+            game.error = str(error)
+            return
+        yield board, colour, piece, move
+        board.make_move(piece, move)
+        colour ^= 1
+
+
+def positions(games, start_pieces="white"):
+    """Pipeline stage: (game, board, colour, piece, move) for every move of every game"""
+    for game in games:
+        for board, colour, piece, move in replay(game, start_pieces):
+            yield game, board, colour, piece, move
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Read PGN games and replay their moves")
+    parser.add_argument("pgn", nargs="+", help="PGN files (- for stdin)")
+    parser.add_argument("--fen", action="store_true", help="print the FEN of every position before a move")
+    args = parser.parse_args(argv)
+
+    games = moves = 0
+    for path in args.pgn:
+        for game in read_games(path):
+            games += 1
+            for board, colour, piece, move in replay(game):
+                if args.fen:
+                    print(board.to_fen(colour))
+                moves += 1
+            if game.error:
+                print(f"game {games}: {game.error}", file=sys.stderr)
+    print(f"{games} games, {moves} moves", file=sys.stderr if args.fen else sys.stdout)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,21 +1,25 @@
-import os
+# colour codes (index of the side) and piece type codes used by the board and engine
+WHITE, BLACK = 0, 1
+COLOUR_INDEX = {"white": WHITE, "black": BLACK}
+COLOUR_NAMES = ("white", "black")
+
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(6)
+PIECE_NAMES = ("pawn", "knight", "bishop", "rook", "queen", "king")
 
 class Piece:
 
-    def __init__(self, name, colour, value, texture=None, texture_rect=None):
+    # textures and screen rects belong to the GUI (see Game.texture), a piece only keeps game state
+    __slots__ = ("name", "colour", "side", "kind", "value", "moves", "moved")
+
+    def __init__(self, name, colour, kind, value):
         self.name = name
         self.colour = colour
+        self.side = COLOUR_INDEX[colour]
+        self.kind = kind
         value_sign = 1 if colour == "white" else -1
         self.value = value * value_sign
         self.moves = []
         self.moved = False
-        self.texture = texture
-        self.set_texture()
-        self.texture_rect = texture_rect
-
-    def set_texture(self, size=80):
-        # Use relative path from the project root
-        self.texture = os.path.join("images", f"{self.colour}_{self.name}.png")
 
     def add_move(self, move):
         self.moves.append(move)
@@ -25,6 +29,8 @@ class Piece:
 
 class Pawn(Piece):
 
+    __slots__ = ("dir", "en_passant")
+
     def __init__(self, colour, start_pieces):
         if start_pieces == "white":
             self.dir = -1 if colour == "white" else 1
@@ -33,31 +39,41 @@ class Pawn(Piece):
             self.dir = 1 if colour == "white" else -1
             self.en_passant = False
 
-        super().__init__("pawn", colour, 1.0)
+        super().__init__("pawn", colour, PAWN, 1.0)
 
 class Knight(Piece):
 
+    __slots__ = ()
+
     def __init__(self, colour):
-        super().__init__("knight", colour, 3.0)
+        super().__init__("knight", colour, KNIGHT, 3.0)
 
 class Bishop(Piece):
 
+    __slots__ = ()
+
     def __init__(self, colour):
-        super().__init__("bishop", colour, 3.0)
+        super().__init__("bishop", colour, BISHOP, 3.0)
 
 class Rook(Piece):
 
+    __slots__ = ()
+
     def __init__(self, colour):
-        super().__init__("rook", colour, 5.0)
+        super().__init__("rook", colour, ROOK, 5.0)
 
 class Queen(Piece):
 
+    __slots__ = ()
+
     def __init__(self, colour):
-        super().__init__("queen", colour, 9.0)
+        super().__init__("queen", colour, QUEEN, 9.0)
 
 class King(Piece):
 
+    __slots__ = ("left_rook", "right_rook")
+
     def __init__(self, colour):
         self.left_rook = None
         self.right_rook = None
-        super().__init__("king", colour, 20000.0)
+        super().__init__("king", colour, KING, 20000.0)
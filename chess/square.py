@@ -1,6 +1,8 @@
 
 class Square:
 
+    __slots__ = ("row", "col", "piece")
+
     def __init__(self, row, col, piece=None):
         self.row = row
         self.col = col
@@ -15,14 +17,14 @@ class Square:
     def isempty(self):
         return not self.has_piece()
 
-    def has_team_piece(self, colour):
-        return self.has_piece() and self.piece.colour == colour
+    def has_team_piece(self, side):
+        return self.has_piece() and self.piece.side == side
 
-    def has_enemy_piece(self, colour):
-        return self.has_piece() and self.piece.colour != colour
+    def has_enemy_piece(self, side):
+        return self.has_piece() and self.piece.side != side
 
-    def isempty_or_enemy(self, colour):
-        return self.isempty() or self.has_enemy_piece(colour)
+    def isempty_or_enemy(self, side):
+        return self.isempty() or self.has_enemy_piece(side)
 
     @staticmethod
     def in_range(*args):
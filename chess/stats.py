@@ -0,0 +1,50 @@
+class SearchStats:
+
+    __slots__ = ("source", "depth", "elapsed", "nodes", "qnodes", "tt_probes", "tt_hits", "cutoffs",
+                 "depth_times", "move_generations", "check_tests", "board_copies")
+
+    def __init__(self):
+        # where the move came from: "search", "book" or "tablebases"
+        self.source = "search"
+        # deepest completed iteration and seconds the search took
+        self.depth = 0
+        self.elapsed = 0.0
+        # nodes visited, quiescence nodes among them
+        self.nodes = 0
+        self.qnodes = 0
+        # transposition table lookups and those that found the position
+        self.tt_probes = 0
+        self.tt_hits = 0
+        # beta cutoffs by the index of the move that caused them (0 = first move searched)
+        self.cutoffs = []
+        # seconds spent on each completed iteration (depth 1 first)
+        self.depth_times = []
+        # legal move generations, check tests and board copies (deepcopy or BitBoard) made
+        self.move_generations = 0
+        self.check_tests = 0
+        self.board_copies = 0
+
+    @property
+    def nps(self):
+        return int(self.nodes / self.elapsed) if self.elapsed > 0 else 0
+
+    def merge(self, other):
+        """Add the counters of a worker of a parallel search (its nodes are counted by the engine)"""
+        self.tt_probes += other.tt_probes
+        self.tt_hits += other.tt_hits
+        self.move_generations += other.move_generations
+        self.check_tests += other.check_tests
+        self.board_copies += other.board_copies
+        for index, count in enumerate(other.cutoffs):
+            if index == len(self.cutoffs):
+                self.cutoffs.append(0)
+            self.cutoffs[index] += count
+
+    def as_dict(self):
+        """Every field and nps, ready for json.dumps"""
+        stats = {name: getattr(self, name) for name in self.__slots__}
+        stats["nps"] = self.nps
+        stats["cutoffs"] = list(self.cutoffs)
+        stats["depth_times"] = [round(seconds, 6) for seconds in self.depth_times]
+        stats["elapsed"] = round(self.elapsed, 6)
+        return stats
@@ -0,0 +1,296 @@
+"""
+Endgame tablebases: distance to mate of every KQK, KRK and KPK position, generated
+by retrograde analysis and probed by the engine search.
+
+The side with the extra piece is stored as white. A table has one byte per
+position: 0 for a draw (or an illegal position), otherwise the number of plies
+to mate + 1. With the strong side to move that is a win, with the lone king to
+move a loss. Positions are indexed by side to move, strong king, weak king and
+piece square (0 = a8 ... 63 = h1, white at the bottom). Symmetry keeps the
+strong king on a1-d1-d4 (10 squares) without pawns and on the a-d files with
+one, so the files take 80 KB (KQK, KRK) and 256 KB (KPK).
+
+    python tablebase.py generate            # write the tables to tablebases/
+    python tablebase.py probe KRK 60 4 63   # strong king, weak king, piece; strong side to move
+"""
+import argparse
+import mmap
+import os
+import sys
+import time
+
+from bitboard import KING_ATTACKS, PAWN_ATTACKS, rook_attacks, bishop_attacks
+from piece import *
+
+DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tablebases")
+
+# Tables in order of generation (KPK promotes into KQK)
+TABLES = {"KQK": QUEEN, "KRK": ROOK, "KPK": PAWN}
+
+# strong king squares of a pawnless table: a1-d1-d4 triangle
+TRIANGLE = [sq for sq in range(64) if sq >> 3 >= 4 and sq & 7 <= 3 and sq & 7 >= 7 - (sq >> 3)]
+TRIANGLE_INDEX = {sq: i for i, sq in enumerate(TRIANGLE)}
+
+
+def _attacks(kind, sq, occupied):
+    if kind == QUEEN:
+        return rook_attacks(sq, occupied) | bishop_attacks(sq, occupied)
+    if kind == ROOK:
+        return rook_attacks(sq, occupied)
+    return PAWN_ATTACKS[WHITE][sq]
+
+
+def _index(weak_to_move, strong_king, weak_king, sq):
+    # position in the full table used while generating
+    return weak_to_move << 18 | strong_king << 12 | weak_king << 6 | sq
+
+
+def _legal(kind, weak_to_move, strong_king, weak_king, sq):
+    if strong_king == weak_king or sq == strong_king or sq == weak_king:
+        return False
+    if KING_ATTACKS[strong_king] >> weak_king & 1:
+        return False
+    if kind == PAWN and sq >> 3 in (0, 7):
+        return False
+    # with the strong side to move, the lone king cannot be in check
+    occupied = 1 << strong_king | 1 << weak_king | 1 << sq
+    return weak_to_move or not _attacks(kind, sq, occupied) >> weak_king & 1
+
+
+def _weak_moves(kind, strong_king, weak_king, sq):
+    """Squares the lone king can go to, and whether it is in check"""
+    occupied = 1 << strong_king | 1 << sq
+    attacked = _attacks(kind, sq, occupied) | KING_ATTACKS[strong_king]
+    targets = []
+    bits = KING_ATTACKS[weak_king]
+    while bits:
+        low = bits & -bits
+        bits ^= low
+        target = low.bit_length() - 1
+        # taking the piece is fine when the king does not defend it
+        if not attacked & low and (target != sq or not KING_ATTACKS[strong_king] & low):
+            targets.append(target)
+    in_check = _attacks(kind, sq, occupied | 1 << weak_king) >> weak_king & 1
+    return targets, in_check
+
+
+def _strong_unmoves(kind, strong_king, weak_king, sq):
+    """Strong side to move positions (strong king, piece) that reach this one in one move"""
+    occupied = 1 << strong_king | 1 << weak_king | 1 << sq
+    bits = KING_ATTACKS[strong_king] & ~occupied & ~KING_ATTACKS[weak_king]
+    while bits:
+        low = bits & -bits
+        bits ^= low
+        yield low.bit_length() - 1, sq
+
+    if kind == PAWN:
+        # one step back, two from the fourth rank
+        if sq >> 3 < 6 and not occupied >> (sq + 8) & 1:
+            yield strong_king, sq + 8
+            if sq >> 3 == 4 and not occupied >> (sq + 16) & 1:
+                yield strong_king, sq + 16
+        return
+    bits = _attacks(kind, sq, occupied) & ~occupied
+    while bits:
+        low = bits & -bits
+        bits ^= low
+        yield strong_king, low.bit_length() - 1
+
+
+def generate(kind, promotion_table=None):
+    """Full table (bytearray indexed by _index) of distance to mate + 1, 0 for draws"""
+    size = 1 << 19
+    values = bytearray(size)
+    legal = bytearray(size)
+    # lone king moves not yet known to lose, per weak to move position
+    counters = [0] * (1 << 18)
+
+    frontier = []
+    # wins by promotion, by number of plies
+    promotions = {}
+    for strong_king in range(64):
+        for weak_king in range(64):
+            for sq in range(64):
+                for weak_to_move in (0, 1):
+                    if _legal(kind, weak_to_move, strong_king, weak_king, sq):
+                        legal[_index(weak_to_move, strong_king, weak_king, sq)] = 1
+                if not legal[_index(1, strong_king, weak_king, sq)]:
+                    continue
+                targets, in_check = _weak_moves(kind, strong_king, weak_king, sq)
+                counters[_index(0, strong_king, weak_king, sq)] = len(targets)
+                if not targets and in_check:
+                    values[_index(1, strong_king, weak_king, sq)] = 1
+                    frontier.append((strong_king, weak_king, sq))
+
+                if kind == PAWN and sq >> 3 == 1 and sq - 8 not in (strong_king, weak_king) and \
+                        legal[_index(0, strong_king, weak_king, sq)]:
+                    # promotion to a queen leads into KQK with the lone king to move
+                    value = promotion_table[_index(1, strong_king, weak_king, sq - 8)]
+                    if value:
+                        promotions.setdefault(value, []).append(_index(0, strong_king, weak_king, sq))
+
+    plies = 0
+    while frontier or any(value > plies for value in promotions):
+        # positions of the frontier are lost in plies, the moves into them win in plies + 1
+        wins = []
+        for strong_king, weak_king, sq in frontier:
+            for from_king, from_sq in _strong_unmoves(kind, strong_king, weak_king, sq):
+                index = _index(0, from_king, weak_king, from_sq)
+                if legal[index] and not values[index]:
+                    values[index] = plies + 2
+                    wins.append((from_king, weak_king, from_sq))
+        for index in promotions.get(plies + 1, ()):
+            if not values[index]:
+                values[index] = plies + 2
+                wins.append((index >> 12 & 63, index >> 6 & 63, index & 63))
+
+        # a lone king position is lost in plies + 2 once all its moves lead to such wins
+        frontier = []
+        for strong_king, weak_king, sq in wins:
+            bits = KING_ATTACKS[weak_king] & ~(1 << strong_king | 1 << sq)
+            while bits:
+                low = bits & -bits
+                bits ^= low
+                from_king = low.bit_length() - 1
+                index = _index(1, strong_king, from_king, sq)
+                if legal[index] and not values[index]:
+                    counters[index & 0x3FFFF] -= 1
+                    if not counters[index & 0x3FFFF]:
+                        values[index] = plies + 3
+                        frontier.append((strong_king, from_king, sq))
+        plies += 2
+    return values
+
+
+def _symmetry(kind, strong_king, weak_king, sq):
+    """Squares moved so the strong king is on a stored square (a-d files, a1-d1-d4 without pawns)"""
+    squares = (strong_king, weak_king, sq)
+    if strong_king & 7 > 3:
+        squares = tuple(s ^ 7 for s in squares)
+    if kind != PAWN:
+        if squares[0] >> 3 < 4:
+            squares = tuple(s ^ 56 for s in squares)
+        if squares[0] & 7 < 7 - (squares[0] >> 3):
+            # reflect in the a1-h8 diagonal
+            squares = tuple((7 - (s & 7)) * 8 + 7 - (s >> 3) for s in squares)
+    return squares
+
+
+def _stored_index(kind, weak_to_move, strong_king, weak_king, sq):
+    if kind == PAWN:
+        king = (strong_king >> 3) * 4 + (strong_king & 7)
+        return ((weak_to_move * 32 + king) * 64 + weak_king) * 64 + sq
+    return ((weak_to_move * 10 + TRIANGLE_INDEX[strong_king]) * 64 + weak_king) * 64 + sq
+
+
+def _compact(kind, values):
+    kings = [sq for sq in range(64) if sq & 7 <= 3] if kind == PAWN else TRIANGLE
+    table = bytearray(2 * len(kings) * 64 * 64)
+    for weak_to_move in (0, 1):
+        for strong_king in kings:
+            for weak_king in range(64):
+                start = _index(weak_to_move, strong_king, weak_king, 0)
+                stored = _stored_index(kind, weak_to_move, strong_king, weak_king, 0)
+                table[stored:stored + 64] = values[start:start + 64]
+    return table
+
+
+def generate_all(directory=DIRECTORY, log=print):
+    """Write every table to the directory"""
+    os.makedirs(directory, exist_ok=True)
+    queen_values = None
+    for name, kind in TABLES.items():
+        start = time.time()
+        values = generate(kind, queen_values)
+        if kind == QUEEN:
+            queen_values = values
+        with open(os.path.join(directory, name + ".tb"), "wb") as f:
+            f.write(_compact(kind, values))
+        log(f"{name}: longest mate {max(values) - 1} plies, {time.time() - start:.1f}s")
+
+
+class Tablebases:
+
+    # Largest number of pieces (kings included) a table covers
+    MAX_PIECES = 3
+
+    def __init__(self, directory=DIRECTORY):
+        self.directory = directory
+        self.tables = {}
+        self._files = []
+        for name, kind in TABLES.items():
+            path = os.path.join(directory, name + ".tb")
+            if os.path.exists(path):
+                f = open(path, "rb")
+                self._files.append(f)
+                self.tables[kind] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __reduce__(self):
+        # worker processes map the files again
+        return Tablebases, (self.directory,)
+
+    def close(self):
+        for table in self.tables.values():
+            table.close()
+        for f in self._files:
+            f.close()
+        self.tables = {}
+        self._files = []
+
+    def probe(self, position, colour):
+        """
+        (result, plies to mate) for colour to move: result 1 when it mates, -1 when it gets
+        mated, 0 for a draw (bare kings included, plies 0), None for positions without a table
+        """
+        pieces = position.piece_list()
+        if len(pieces) == 2:
+            return 0, 0
+        if len(pieces) != 3:
+            return None
+        strong = [(side, kind, sq) for side, kind, sq in pieces if kind != KING]
+        strong_side, kind, sq = strong[0]
+        table = self.tables.get(kind)
+        if table is None:
+            return None
+        kings = {side: sq for side, piece_kind, sq in pieces if piece_kind == KING}
+        strong_king, weak_king = kings[strong_side], kings[strong_side ^ 1]
+        if strong_side == BLACK:
+            # tables are stored with the strong side as white, moving up the board
+            strong_king, weak_king, sq = strong_king ^ 56, weak_king ^ 56, sq ^ 56
+        weak_to_move = int(colour != strong_side)
+
+        value = table[_stored_index(kind, weak_to_move, *_symmetry(kind, strong_king, weak_king, sq))]
+        if not value:
+            return 0, 0
+        return (-1 if weak_to_move else 1), value - 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate or probe the endgame tablebases")
+    commands = parser.add_subparsers(dest="command", required=True)
+    generate_parser = commands.add_parser("generate", help="generate every table")
+    generate_parser.add_argument("--directory", default=DIRECTORY)
+    probe_parser = commands.add_parser("probe", help="value of one position")
+    probe_parser.add_argument("table", choices=sorted(TABLES))
+    probe_parser.add_argument("squares", type=int, nargs=3, help="strong king, weak king and piece (0 = a8 ... 63 = h1)")
+    probe_parser.add_argument("--weak-to-move", action="store_true")
+    probe_parser.add_argument("--directory", default=DIRECTORY)
+    args = parser.parse_args(argv)
+
+    if args.command == "generate":
+        generate_all(args.directory)
+        return 0
+
+    kind = TABLES[args.table]
+    tablebases = Tablebases(args.directory)
+    weak_to_move = int(args.weak_to_move)
+    if not _legal(kind, weak_to_move, *args.squares):
+        print("illegal position")
+        return 1
+    value = tablebases.tables[kind][_stored_index(kind, weak_to_move, *_symmetry(kind, *args.squares))]
+    print("draw" if not value else f"{'loses' if weak_to_move else 'wins'} in {value - 1} plies")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+from piece import WHITE, BLACK, PIECE_NAMES
+
+# Piece-square tables for positional evaluation
+# Values are from white's perspective (row 0-7, col 0-7)
+PAWN_TABLE = [
+    [0,  0,  0,  0,  0,  0,  0,  0],
+    [0.5, 0.5, 0.5, 0.5, 0.5, 0.5, 0.5, 0.5],
+    [0.1, 0.1, 0.2, 0.3, 0.3, 0.2, 0.1, 0.1],
+    [0.05, 0.05, 0.1, 0.25, 0.25, 0.1, 0.05, 0.05],
+    [0,  0,  0,  0.2, 0.2,  0,  0,  0],
+    [0.05, -0.05, -0.1,  0,  0, -0.1, -0.05, 0.05],
+    [0.05, 0.1, 0.1, -0.2, -0.2, 0.1, 0.1, 0.05],
+    [0,  0,  0,  0,  0,  0,  0,  0]
+]
+
+KNIGHT_TABLE = [
+    [-0.5, -0.4, -0.3, -0.3, -0.3, -0.3, -0.4, -0.5],
+    [-0.4, -0.2,  0,  0,  0,  0, -0.2, -0.4],
+    [-0.3,  0, 0.1, 0.15, 0.15, 0.1,  0, -0.3],
+    [-0.3, 0.05, 0.15, 0.2, 0.2, 0.15, 0.05, -0.3],
+    [-0.3,  0, 0.15, 0.2, 0.2, 0.15,  0, -0.3],
+    [-0.3, 0.05, 0.1, 0.15, 0.15, 0.1, 0.05, -0.3],
+    [-0.4, -0.2,  0, 0.05, 0.05,  0, -0.2, -0.4],
+    [-0.5, -0.4, -0.3, -0.3, -0.3, -0.3, -0.4, -0.5]
+]
+
+BISHOP_TABLE = [
+    [-0.2, -0.1, -0.1, -0.1, -0.1, -0.1, -0.1, -0.2],
+    [-0.1,  0,  0,  0,  0,  0,  0, -0.1],
+    [-0.1,  0, 0.05, 0.1, 0.1, 0.05,  0, -0.1],
+    [-0.1, 0.05, 0.05, 0.1, 0.1, 0.05, 0.05, -0.1],
+    [-0.1,  0, 0.1, 0.1, 0.1, 0.1,  0, -0.1],
+    [-0.1, 0.1, 0.1, 0.1, 0.1, 0.1, 0.1, -0.1],
+    [-0.1, 0.05,  0,  0,  0,  0, 0.05, -0.1],
+    [-0.2, -0.1, -0.1, -0.1, -0.1, -0.1, -0.1, -0.2]
+]
+
+ROOK_TABLE = [
+    [0,  0,  0,  0,  0,  0,  0,  0],
+    [0.05, 0.1, 0.1, 0.1, 0.1, 0.1, 0.1, 0.05],
+    [-0.05,  0,  0,  0,  0,  0,  0, -0.05],
+    [-0.05,  0,  0,  0,  0,  0,  0, -0.05],
+    [-0.05,  0,  0,  0,  0,  0,  0, -0.05],
+    [-0.05,  0,  0,  0,  0,  0,  0, -0.05],
+    [-0.05,  0,  0,  0,  0,  0,  0, -0.05],
+    [0,  0,  0, 0.05, 0.05,  0,  0,  0]
+]
+
+QUEEN_TABLE = [
+    [-0.2, -0.1, -0.1, -0.05, -0.05, -0.1, -0.1, -0.2],
+    [-0.1,  0,  0,  0,  0,  0,  0, -0.1],
+    [-0.1,  0, 0.05, 0.05, 0.05, 0.05,  0, -0.1],
+    [-0.05,  0, 0.05, 0.05, 0.05, 0.05,  0, -0.05],
+    [0,  0, 0.05, 0.05, 0.05, 0.05,  0,  0],
+    [-0.1, 0.05, 0.05, 0.05, 0.05, 0.05, 0.05, -0.1],
+    [-0.1,  0, 0.05,  0,  0, 0.05,  0, -0.1],
+    [-0.2, -0.1, -0.1, -0.05, -0.05, -0.1, -0.1, -0.2]
+]
+
+KING_TABLE_MIDDLE = [
+    [-0.3, -0.4, -0.4, -0.5, -0.5, -0.4, -0.4, -0.3],
+    [-0.3, -0.4, -0.4, -0.5, -0.5, -0.4, -0.4, -0.3],
+    [-0.3, -0.4, -0.4, -0.5, -0.5, -0.4, -0.4, -0.3],
+    [-0.3, -0.4, -0.4, -0.5, -0.5, -0.4, -0.4, -0.3],
+    [-0.2, -0.3, -0.3, -0.4, -0.4, -0.3, -0.3, -0.2],
+    [-0.1, -0.2, -0.2, -0.2, -0.2, -0.2, -0.2, -0.1],
+    [0.2, 0.2,  0,  0,  0,  0, 0.2, 0.2],
+    [0.2, 0.3, 0.1,  0,  0, 0.1, 0.3, 0.2]
+]
+
+PIECE_SQUARE_TABLES = {
+    "pawn": PAWN_TABLE,
+    "knight": KNIGHT_TABLE,
+    "bishop": BISHOP_TABLE,
+    "rook": ROOK_TABLE,
+    "queen": QUEEN_TABLE,
+    "king": KING_TABLE_MIDDLE,
+}
+
+# Material values in pawns
+PIECE_VALUES = {"pawn": 1.0, "knight": 3.0, "bishop": 3.0, "rook": 5.0, "queen": 9.0, "king": 20000.0}
+
+
+# Tables and values indexed by piece type code
+SQUARE_TABLES = tuple(PIECE_SQUARE_TABLES[name] for name in PIECE_NAMES)
+KIND_VALUES = tuple(PIECE_VALUES[name] for name in PIECE_NAMES)
+
+
+def piece_square_value(kind, side, row, col):
+    """Get positional value from piece-square table"""
+    # Flip row for black pieces (black's perspective)
+    if side == BLACK:
+        row = 7 - row
+    return SQUARE_TABLES[kind][row][col]
+
+
+def piece_score(kind, side, row, col):
+    """Material plus positional value of a piece, positive favours white"""
+    value = KIND_VALUES[kind] + piece_square_value(kind, side, row, col)
+    return value if side == WHITE else -value
+
+
+# piece_score in centipawns per [side][kind][row * 8 + col]. Integers, so running
+# totals updated move by move never drift from a full recount.
+SCORES = [[[round(piece_score(kind, side, row, col) * 100) for row in range(8) for col in range(8)]
+           for kind in range(6)] for side in (WHITE, BLACK)]
@@ -0,0 +1,289 @@
+"""
+UCI front end: the engine without a window, speaking the Universal Chess Interface
+over stdin/stdout so chess GUIs and match harnesses can run it. pygame is not
+imported.
+
+    python uci.py
+
+Supported commands: uci, isready, setoption (Threads, OwnBook, Ponder), ucinewgame,
+position [startpos | fen ...] [moves ...], go [ponder] [depth | nodes | movetime |
+wtime btime winc binc movestogo | infinite], ponderhit, stop, quit.
+"""
+import copy
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from board import Board
+from engine import Engine
+from book import OpeningBook
+from tablebase import Tablebases
+from piece import *
+
+NAME = "Chess-Game"
+
+BOOK = os.path.join(os.path.dirname(os.path.abspath(__file__)), "book.bin")
+
+# Seconds kept back from each timed search for the reply to reach the GUI
+MOVE_OVERHEAD = 0.05
+
+
+class Uci:
+
+    def __init__(self, output=sys.stdout):
+        self.output = output
+        self._lock = threading.Lock()
+        self.threads = 1
+        self.own_book = True
+        self.engine = self._new_engine()
+        self.board, self.colour = Board("white"), WHITE
+        # Thread running the searches and future of the running one, done once bestmove is sent
+        self._thread = ThreadPoolExecutor(max_workers=1)
+        self.search = None
+        self._search_start = None
+        # An infinite search only answers once it is told to stop, a ponder search once it is told
+        # to stop or the pondered move is played (ponderhit)
+        self._infinite = False
+        self._pondering = False
+        self._stop = threading.Event()
+        # Limits of the ponder search after ponderhit: (depth, time limit, node limit)
+        self._ponder_limits = None
+
+    def _new_engine(self):
+        book = OpeningBook(BOOK) if self.own_book and os.path.exists(BOOK) else None
+        engine = Engine(depth=4, backend="bitboard", workers=self.threads, book=book, tablebases=Tablebases())
+        engine.info = self._info
+        return engine
+
+    def send(self, line):
+        # the search thread reports while the main thread answers commands
+        with self._lock:
+            self.output.write(line + "\n")
+            self.output.flush()
+
+    def handle(self, line):
+        """Run one command line, False once the engine should quit"""
+        words = line.split()
+        if not words:
+            return True
+        command, args = words[0], words[1:]
+        if command == "uci":
+            self.send(f"id name {NAME}")
+            self.send("id author Chess-Game authors")
+            self.send("option name Threads type spin default 1 min 1 max 64")
+            self.send("option name OwnBook type check default true")
+            self.send("option name Ponder type check default false")
+            self.send("uciok")
+        elif command == "isready":
+            self.send("readyok")
+        elif command == "setoption":
+            self.set_option(args)
+        elif command == "ucinewgame":
+            self.stop()
+            self.engine.close()
+            # fresh transposition table and history
+            self.engine = self._new_engine()
+        elif command == "position":
+            self.stop()
+            self.position(args)
+        elif command == "go":
+            self.stop()
+            self.go(args)
+        elif command == "ponderhit":
+            self.ponder_hit()
+        elif command == "stop":
+            self.stop()
+        elif command == "quit":
+            self.stop()
+            return False
+        else:
+            self.send(f"info string unknown command {command}")
+        return True
+
+    def set_option(self, args):
+        if "name" not in args:
+            return
+        rest = args[args.index("name") + 1:]
+        if "value" in rest:
+            name, value = " ".join(rest[:rest.index("value")]), " ".join(rest[rest.index("value") + 1:])
+        else:
+            name, value = " ".join(rest), ""
+        if name.lower() == "threads" and value.isdigit():
+            self.threads = max(1, int(value))
+        elif name.lower() == "ownbook":
+            self.own_book = value.lower() == "true"
+        elif name.lower() == "ponder":
+            # the GUI decides when to ponder with "go ponder", nothing to change
+            return
+        else:
+            self.send(f"info string unknown option {name}")
+            return
+        self.stop()
+        self.engine.close()
+        self.engine = self._new_engine()
+
+    def position(self, args):
+        moves = []
+        if "moves" in args:
+            moves = args[args.index("moves") + 1:]
+            args = args[:args.index("moves")]
+        try:
+            if args and args[0] == "fen":
+                board, colour = Board.from_fen(" ".join(args[1:]))
+            else:
+                board, colour = Board("white"), WHITE
+        except ValueError as error:
+            self.send(f"info string {error}")
+            return
+        for name in moves:
+            found = find_move(board, colour, name)
+            if found is None:
+                self.send(f"info string illegal move {name}")
+                break
+            board.make_move(*found)
+            colour ^= 1
+        self.board, self.colour = board, colour
+
+    def go(self, args):
+        options = {}
+        for i, word in enumerate(args[:-1]):
+            if args[i + 1].lstrip("-").isdigit():
+                options[word] = int(args[i + 1])
+        self._infinite = "infinite" in args
+        depth = options.get("depth")
+        time_limit = None
+        if self._infinite:
+            depth, time_limit = Engine.MAX_DEPTH, float('inf')
+        elif "movetime" in options:
+            time_limit = max(0.01, options["movetime"] / 1000 - MOVE_OVERHEAD)
+        elif ("wtime", "btime")[self.colour] in options:
+            remaining = options[("wtime", "btime")[self.colour]] / 1000
+            increment = options.get(("winc", "binc")[self.colour], 0) / 1000
+            if "movestogo" in options:
+                time_limit = remaining / (options["movestogo"] + 1)
+            else:
+                time_limit = self.engine.time_for_move(remaining, self.board.fullmove_number)
+            time_limit = max(0.01, min(time_limit + increment / 2, remaining / 2) - MOVE_OVERHEAD)
+        node_limit = options.get("nodes")
+
+        self._stop.clear()
+        self._search_start = time.time()
+        self._pondering = "ponder" in args
+        if self._pondering:
+            # search without limits until ponderhit gives it these ones
+            self._ponder_limits = depth, time_limit, node_limit
+            self.engine.prepare_ponder()
+            depth, time_limit, node_limit = Engine.MAX_DEPTH, float('inf'), None
+        self.search = self._thread.submit(self._run, copy.deepcopy(self.board), depth, time_limit, node_limit)
+
+    def ponder_hit(self):
+        """The opponent played the pondered move: the ponder search goes on as a normal search"""
+        if self.search is None or not self._pondering:
+            return
+        self._pondering = False
+        self.engine.ponder_hit(*self._ponder_limits)
+        if not self._infinite:
+            # a ponder search already over answers now
+            self._stop.set()
+
+    def stop(self):
+        """End the running search, its bestmove is sent before this returns"""
+        self._stop.set()
+        # a search that has not started yet would clear the flag, so stop until it is over
+        while self.search is not None and not self.search.done():
+            self.engine.stop()
+            wait([self.search], timeout=0.01)
+        self.search = None
+
+    def close(self):
+        self.stop()
+        self.engine.close()
+        self._thread.shutdown()
+
+    def _info(self, depth, score):
+        elapsed = max(time.time() - self._search_start, 1e-6)
+        nodes = self.engine.nodes
+        pv = pv_names(self.board, self.colour, self.engine.pv)
+        self.send(f"info depth {depth} score {self._score(score, len(pv))} nodes {nodes} "
+                  f"nps {int(nodes / elapsed)} time {int(elapsed * 1000)} pv {' '.join(pv)}")
+
+    def _score(self, score, pv_length):
+        moves = mate_moves(score, pv_length)
+        return f"cp {int(score)}" if moves is None else f"mate {moves}"
+
+    def _run(self, board, depth, time_limit, node_limit):
+        # the engine searches a copy, the root board stays free for naming the moves
+        result = self.engine.search(board, self.colour, depth, time_limit, node_limit)
+        if self._infinite or self._pondering:
+            # "go infinite" only ends with stop, even when a mate was found, "go ponder" with stop
+            # or ponderhit
+            self._stop.wait()
+        if result is None:
+            self.send("bestmove 0000")
+            return
+        pv = pv_names(self.board, self.colour, self.engine.pv[:2])
+        best = move_name(board, *result)
+        ponder = f" ponder {pv[1]}" if len(pv) > 1 and pv[0] == best else ""
+        self.send(f"bestmove {best}{ponder}")
+
+
+def find_move(board, colour, name):
+    """The legal (piece, move) of a UCI move name ("e2e4", "e7e8q"), None if there is none"""
+    for piece, move in board.legal_moves(colour):
+        if move_name(board, piece, move) == name.lower():
+            return piece, move
+    return None
+
+
+def move_name(board, piece, move):
+    """UCI name of a move ("e2e4", "e7e8q")"""
+    name = board.square_name(move.initial.row, move.initial.col) + board.square_name(move.final.row, move.final.col)
+    # the board always promotes to a queen
+    if piece.kind == PAWN and name[3] in "18":
+        name += "q"
+    return name
+
+
+def pv_names(board, colour, pv):
+    """UCI names of a principal variation given as move squares, played out on the board and taken back"""
+    names = []
+    undos = []
+    for squares in pv:
+        for piece, move in board.legal_moves(colour):
+            if board.move_squares(move) == squares:
+                break
+        else:
+            break
+        names.append(move_name(board, piece, move))
+        undos.append(board.make_move(piece, move))
+        colour ^= 1
+    for undo in reversed(undos):
+        board.unmake_move(undo)
+    return names
+
+
+def mate_moves(score, pv_length):
+    """Moves to mate (negative when getting mated) of a search score, None for a centipawn score"""
+    if score in (float('inf'), float('-inf')):
+        # mate found by the search, in as many moves as the principal variation shows
+        moves = (pv_length + 1) // 2
+    elif abs(score) > Engine.TABLEBASE_WIN - 1000:
+        moves = (Engine.TABLEBASE_WIN - abs(score) + 1) // 2
+    else:
+        return None
+    return moves if score > 0 else -moves
+
+
+def main():
+    uci = Uci()
+    for line in sys.stdin:
+        if not uci.handle(line):
+            break
+    uci.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
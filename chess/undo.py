@@ -0,0 +1,24 @@
+class Undo:
+
+    def __init__(self, piece, move, moved, last_move, en_passant, zobrist, castling_rights, score, halfmove_clock):
+        # piece and move that were played
+        self.piece = piece
+        self.move = move
+        # state of the board before the move
+        self.moved = moved
+        self.last_move = last_move
+        self.en_passant = en_passant
+        self.zobrist = zobrist
+        self.castling_rights = castling_rights
+        self.score = score
+        self.halfmove_clock = halfmove_clock
+        # captured piece and the square it was taken on (differs for en passant)
+        self.captured = None
+        self.captured_row = None
+        self.captured_col = None
+        # piece that replaced a promoted pawn
+        self.promoted = None
+        # castling rook relocation (rook, initial col, final col)
+        self.rook = None
+        self.rook_initial_col = None
+        self.rook_final_col = None
@@ -0,0 +1,21 @@
+import random
+
+from piece import WHITE, BLACK
+
+# Zobrist keys shared by Board and BitBoard. Squares are numbered with white
+# at the bottom (0 = a8, 63 = h1) so both orientations hash the same position
+# to the same key.
+
+_random = random.Random(20240601)
+
+# [side][kind] -> key per square
+PIECE_KEYS = [[[_random.getrandbits(64) for sq in range(64)] for kind in range(6)] for side in (WHITE, BLACK)]
+
+# xor-ed in when black is to move
+SIDE_KEY = _random.getrandbits(64)
+
+# one key per castling rights mask (1 = white kingside, 2 = white queenside, 4 = black kingside, 8 = black queenside)
+CASTLING_KEYS = [_random.getrandbits(64) for rights in range(16)]
+
+# one key per file of the en passant pawn
+EN_PASSANT_KEYS = [_random.getrandbits(64) for file in range(8)]